@@ -61,7 +61,12 @@ def compare_cmc_files():
         
         return diff_file
     else:
-        print("❌ Failed to generate diff")
+        # generate_diff also returns None when there is nothing to diff, which is not a failure
+        old_text_sections = tracker.load_text_sections(old_file)
+        if old_text_sections is not None and old_text_sections == tracker.load_text_sections(new_file):
+            print(f"✅ No text changes between {old_file.stem} and {new_file.stem}, no diff needed")
+        else:
+            print("❌ Failed to generate diff")
         return None
 
 if __name__ == "__main__":
@@ -5,10 +5,119 @@ This script archives old webpage versions and diffs before implementing the new
 """
 
 import os
+import sys
+import json
 import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# Copying is I/O-bound, so oversubscribe the CPU count to keep the disk queue busy
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Records (mtime_ns, size) of every archived file so the next run can skip unchanged ones
+MANIFEST_NAME = 'archive_manifest.json'
+
+def collect_copy_jobs(src_root, dst_root, suffix=None):
+    """Walk src_root with os.scandir and return a flat list of (src, dst) file pairs.
+    
+    Directories are listed too, as (src, dst) pairs whose dst ends with os.sep,
+    so empty ones are archived like copytree would.
+    """
+    jobs = []
+    stack = [(os.fspath(src_root), os.fspath(dst_root))]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        with os.scandir(src_dir) as it:
+            for entry in it:
+                dst = os.path.join(dst_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, dst))
+                    jobs.append((entry.path, dst + os.sep))
+                elif entry.is_file() and (suffix is None or entry.name.endswith(suffix)):
+                    jobs.append((entry.path, dst))
+    return jobs
+
+def copy_file(src, dst, st=None):
+    """Copy a single file, preserving permission bits and timestamps like shutil.copy2.
+    
+    On Linux the data is copied in-kernel with os.sendfile and the source is
+    stat-ed only once.
+    """
+    if st is None:
+        st = os.stat(src)
+    if sys.platform.startswith('linux'):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            offset = 0
+            while offset < st.st_size:
+                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, st.st_size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+    else:
+        shutil.copyfile(src, dst)
+    os.chmod(dst, stat.S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return dst
+
+def find_previous_archive(current_dir):
+    """Return the most recent archive directory other than current_dir, if any."""
+    archives = sorted(
+        item for item in Path('.').glob('historical_archive_*')
+        if item.is_dir() and item.resolve() != Path(current_dir).resolve()
+    )
+    return archives[-1] if archives else None
+
+def load_manifest(archive_dir):
+    """Load an archive's manifest, or an empty one if it has none."""
+    try:
+        with open(Path(archive_dir) / MANIFEST_NAME, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def archive_file(src, dst, key, previous_dir, previous_manifest):
+    """Hard-link an unchanged file from the previous archive, otherwise copy it."""
+    st = os.stat(src)
+    signature = [st.st_mtime_ns, st.st_size]
+    if previous_dir is not None and previous_manifest.get(key) == signature:
+        try:
+            os.link(os.path.join(previous_dir, key), dst)
+            return key, signature, True
+        except OSError:
+            # Previous copy is gone or on another filesystem; fall back to copying
+            pass
+    copy_file(src, dst, st)
+    return key, signature, False
+
+def copy_files_parallel(jobs, archive_dir, previous_dir=None, previous_manifest=None):
+    """Create all destination directories, then archive files concurrently.
+    
+    Returns the manifest entries for the archived files and how many were hard-linked.
+    """
+    previous_manifest = previous_manifest or {}
+    directories = [(src, dst) for src, dst in jobs if dst.endswith(os.sep)]
+    jobs = [(src, dst) for src, dst in jobs if not dst.endswith(os.sep)]
+    for dst_dir in {os.path.dirname(dst) for _, dst in jobs + directories}:
+        os.makedirs(dst_dir, exist_ok=True)
+    
+    def run(job):
+        src, dst = job
+        return archive_file(src, dst, os.path.relpath(dst, archive_dir), previous_dir, previous_manifest)
+    
+    manifest = {}
+    linked = 0
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+        for key, signature, was_linked in executor.map(run, jobs):
+            manifest[key] = signature
+            linked += was_linked
+    
+    # Directory modes and times last, as copytree does, once their contents are written
+    for src, dst in directories:
+        shutil.copystat(src, dst)
+    return manifest, linked
+
 def archive_historical_data():
     """Archive historical data to preserve it while implementing new structure."""
     
@@ -19,6 +128,12 @@ def archive_historical_data():
     
     print(f"📦 Creating historical archive: {archive_dir}")
     
+    # Unchanged files are hard-linked from the previous archive instead of copied
+    previous_dir = find_previous_archive(archive_dir)
+    previous_manifest = load_manifest(previous_dir) if previous_dir else {}
+    manifest = {}
+    linked = 0
+    
     # Archive webpage versions
     webpage_versions_dir = Path('webpage_versions')
     if webpage_versions_dir.exists():
@@ -33,9 +148,15 @@ def archive_historical_data():
         
         if old_folders:
             print(f"📁 Archiving {len(old_folders)} old folders...")
+            jobs = []
             for folder in old_folders:
                 dest = archive_versions_dir / folder.name
-                shutil.copytree(folder, dest)
+                dest.mkdir(exist_ok=True)
+                jobs.extend(collect_copy_jobs(folder, dest))
+            entries, count = copy_files_parallel(jobs, archive_dir, previous_dir, previous_manifest)
+            manifest.update(entries)
+            linked += count
+            for folder in old_folders:
                 print(f"  ✅ Archived: {folder.name}")
         else:
             print("📁 No old folders to archive")
@@ -50,16 +171,23 @@ def archive_historical_data():
         diff_files = list(diffs_dir.rglob('*.html'))
         if diff_files:
             print(f"🔄 Archiving {len(diff_files)} diff files...")
+            # Keep the relative path structure under the archive
+            jobs = collect_copy_jobs(diffs_dir, archive_diffs_dir, suffix='.html')
+            entries, count = copy_files_parallel(jobs, archive_dir, previous_dir, previous_manifest)
+            manifest.update(entries)
+            linked += count
             for diff_file in diff_files:
-                # Create relative path structure
-                rel_path = diff_file.relative_to(diffs_dir)
-                dest = archive_diffs_dir / rel_path
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(diff_file, dest)
-                print(f"  ✅ Archived: {rel_path}")
+                print(f"  ✅ Archived: {diff_file.relative_to(diffs_dir)}")
         else:
             print("🔄 No diff files to archive")
     
+    if linked:
+        print(f"🔗 Linked {linked} unchanged files from {previous_dir}")
+    
+    # Save manifest for the next run
+    with open(archive_dir / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f)
+    
     # Create archive info file
     info_file = archive_dir / 'archive_info.txt'
     with open(info_file, 'w') as f:
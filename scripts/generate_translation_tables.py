@@ -9,10 +9,9 @@ translation reference tables for translation work.
 import os
 import sys
 import logging
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
 
 # Add parent directory to path to import WebpageTracker
 sys.path.append(str(Path(__file__).parent.parent))
@@ -30,10 +29,81 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Translation tables are written here, one workbook per site and version
+TRANSLATION_DIR = Path('translation_references')
+
+def create_translation_table(text_sections, site_name, date_str):
+    """Write the text sections of a version to an Excel sheet with an empty column for translations.
+    
+    Returns the path of the workbook.
+    """
+    # openpyxl is only needed here, as in WebpageTracker.read_urls_from_excel
+    from openpyxl import Workbook
+    
+    site_dir = TRANSLATION_DIR / site_name
+    site_dir.mkdir(parents=True, exist_ok=True)
+    translation_file = site_dir / f"{date_str}.xlsx"
+    
+    # Write-only mode streams the rows instead of building the whole sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Translation')
+    sheet.append(['Type', 'Source Text', 'Translation'])
+    for section in text_sections:
+        # Sections look like "H2: Pricing"; the prefix says what kind of element it was
+        section_type, _, text = section.partition(': ')
+        sheet.append([section_type, text, ''])
+    workbook.save(translation_file)
+    return translation_file
+
+# Tracker used for text extraction, created once per process (see get_tracker)
+_tracker = None
+
+def get_tracker():
+    """Return this process's WebpageTracker, creating it on first use.
+    
+    Building one sets up a session and an asset thread pool, so worker
+    processes reuse a single tracker for every version they handle.
+    """
+    global _tracker
+    if _tracker is None:
+        _tracker = WebpageTracker()
+    return _tracker
+
+def process_saved_version(version_info):
+    """Process a saved webpage version and create translation table.
+    
+    Defined at module level so it can be dispatched to worker processes.
+    """
+    try:
+        site_name = version_info['site_name']
+        file_path = version_info['file_path']
+        date_str = version_info['date']
+        
+        logger.info(f"Processing {site_name} from {date_str}")
+        
+        # Read HTML content
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        
+        # Extract text content
+        extracted_data = get_tracker().extract_text_content(html_content)
+        if not extracted_data:
+            logger.error(f"Failed to extract content from {file_path}")
+            return None
+        
+        # Create translation table
+        translation_file = create_translation_table(extracted_data, site_name, date_str)
+        logger.info(f"Created translation table: {translation_file}")
+        return translation_file
+    
+    except Exception as e:
+        logger.error(f"Error processing {version_info['file_path']}: {e}")
+        return None
+
 class TranslationTableGenerator:
     def __init__(self):
         self.webpage_versions_dir = Path('webpage_versions')
-        self.translation_dir = Path('translation_references')
+        self.translation_dir = TRANSLATION_DIR
         self.translation_dir.mkdir(exist_ok=True)
     
     def get_all_saved_versions(self):
@@ -58,35 +128,7 @@ class TranslationTableGenerator:
     
     def process_saved_version(self, version_info):
         """Process a saved webpage version and create translation table."""
-        try:
-            site_name = version_info['site_name']
-            file_path = version_info['file_path']
-            date_str = version_info['date']
-            
-            logger.info(f"Processing {site_name} from {date_str}")
-            
-            # Read HTML content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Create tracker instance to use its extraction methods
-            tracker = WebpageTracker()
-            
-            # Extract text content
-            extracted_data = tracker.extract_text_content(html_content, f"file://{file_path}", date_str)
-            if not extracted_data:
-                logger.error(f"Failed to extract content from {file_path}")
-                return None
-            
-            # Create translation table
-            translation_file = tracker.create_translation_table(extracted_data, site_name)
-            if translation_file:
-                logger.info(f"Created translation table: {translation_file}")
-                return translation_file
-            
-        except Exception as e:
-            logger.error(f"Error processing {version_info['file_path']}: {e}")
-            return None
+        return process_saved_version(version_info)
     
     def generate_all_translation_tables(self):
         """Generate translation tables for all saved webpage versions."""
@@ -99,10 +141,12 @@ class TranslationTableGenerator:
         
         logger.info(f"Found {len(versions)} saved webpage versions")
         
+        # Parsing is CPU-bound, so spread versions across processes
         success_count = 0
-        for version in versions:
-            if self.process_saved_version(version):
-                success_count += 1
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for result in executor.map(process_saved_version, versions, chunksize=4):
+                if result:
+                    success_count += 1
         
         logger.info(f"Translation table generation complete! {success_count}/{len(versions)} tables created successfully.")
     
@@ -115,15 +159,18 @@ class TranslationTableGenerator:
             logger.error(f"Site directory not found: {site_dir}")
             return
         
-        # Get the most recent version
-        html_files = list(site_dir.glob("*.html"))
-        if not html_files:
+        # Get the most recent version; filenames are ISO dates, so the
+        # greatest name is the newest and a single pass is enough
+        latest_name = None
+        with os.scandir(site_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.html') and (latest_name is None or entry.name > latest_name):
+                    latest_name = entry.name
+        if latest_name is None:
             logger.error(f"No HTML files found for site: {site_name}")
             return
         
-        # Sort by date and get the most recent
-        html_files.sort(reverse=True)
-        latest_file = html_files[0]
+        latest_file = site_dir / latest_name
         date_str = latest_file.stem
         
         version_info = {
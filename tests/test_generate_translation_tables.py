@@ -0,0 +1,65 @@
+"""Tests for scripts/generate_translation_tables.py."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import generate_translation_tables
+from openpyxl import load_workbook
+
+SAVED_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Pricing</title></head>
+<body>
+    <h1>Plans for every team</h1>
+    <p>Pick the plan that fits how you work.</p>
+    <ul><li>Free trial</li><li>Cancel anytime</li></ul>
+    <a href="/contact">Contact sales</a>
+</body>
+</html>
+"""
+
+class ProcessSavedVersionTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        
+        site_dir = Path('webpage_versions') / 'example-com'
+        site_dir.mkdir(parents=True)
+        self.page = site_dir / '2024-01-02.html'
+        self.page.write_text(SAVED_PAGE, encoding='utf-8')
+    
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+    
+    def test_writes_translation_table(self):
+        translation_file = generate_translation_tables.process_saved_version({
+            'site_name': 'example-com',
+            'file_path': self.page,
+            'date': '2024-01-02'
+        })
+        
+        self.assertEqual(translation_file, Path('translation_references') / 'example-com' / '2024-01-02.xlsx')
+        rows = list(load_workbook(translation_file).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Type', 'Source Text', 'Translation'))
+        self.assertIn(('TITLE', 'Pricing', None), rows)
+        self.assertIn(('H1', 'Plans for every team', None), rows)
+        self.assertIn(('PARAGRAPH', 'Pick the plan that fits how you work.', None), rows)
+        self.assertIn(('LIST ITEM', 'Free trial', None), rows)
+        self.assertIn(('LINK', 'Contact sales (/contact)', None), rows)
+    
+    def test_missing_file_returns_none(self):
+        self.assertIsNone(generate_translation_tables.process_saved_version({
+            'site_name': 'example-com',
+            'file_path': Path('webpage_versions') / 'example-com' / 'missing.html',
+            'date': 'missing'
+        }))
+
+if __name__ == '__main__':
+    unittest.main()
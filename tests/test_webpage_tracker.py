@@ -0,0 +1,96 @@
+"""Tests for the section diff in webpage_tracker.py."""
+
+import json
+import random
+import re
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from webpage_tracker import SectionHtmlDiff, section_opcodes
+
+# Body rows of an iter_table table and the class of each, if it has one
+TABLE_ROW = re.compile(r'^ {12}<tr(?: class="([^"]*)")?>', re.MULTILINE)
+
+def version_pairs():
+    """Pairs of section lists: hand-picked edge cases, then random edits of a page."""
+    yield [], []
+    yield ['TITLE: A'], []
+    yield [], ['TITLE: A']
+    yield ['TITLE: A', 'H1: B'], ['TITLE: A', 'H1: B']
+    yield ['LINK: More', 'P: x', 'LINK: More'], ['LINK: More', 'LINK: More', 'P: y', 'LINK: More']
+    
+    rng = random.Random(1234)
+    for _ in range(50):
+        old = [f"PARAGRAPH: {rng.randrange(8)}" for _ in range(rng.randrange(30))]
+        new = list(old)
+        for _ in range(rng.randrange(6)):
+            k = rng.randrange(len(new) + 1)
+            edit = rng.choice(('insert', 'delete', 'replace'))
+            if edit == 'insert' or not new:
+                new.insert(k, f"PARAGRAPH: new {rng.randrange(8)}")
+            elif edit == 'delete':
+                del new[min(k, len(new) - 1)]
+            else:
+                new[min(k, len(new) - 1)] = f"H2: {rng.randrange(8)}"
+        yield old, new
+
+class SectionOpcodesTest(unittest.TestCase):
+    def test_opcodes_cover_both_lists(self):
+        for old, new in version_pairs():
+            opcodes = section_opcodes(old, new)
+            i = j = 0
+            for tag, i1, i2, j1, j2 in opcodes:
+                self.assertEqual((i1, j1), (i, j))
+                self.assertLessEqual(i1, i2)
+                self.assertLessEqual(j1, j2)
+                if tag == 'equal':
+                    self.assertEqual(old[i1:i2], new[j1:j2])
+                i, j = i2, j2
+            self.assertEqual((i, j), (len(old), len(new)))
+
+class IterTableTest(unittest.TestCase):
+    def test_rows_follow_opcodes(self):
+        for old, new in version_pairs():
+            opcodes = section_opcodes(old, new)
+            expected = []
+            for tag, i1, i2, j1, j2 in opcodes:
+                if tag == 'equal':
+                    expected.extend([None] * (i2 - i1))
+                    continue
+                for k in range(max(i2 - i1, j2 - j1)):
+                    if i1 + k >= i2:
+                        expected.append('has-change added')
+                    elif j1 + k >= j2:
+                        expected.append('has-change removed')
+                    else:
+                        expected.append('has-change changed')
+            
+            table = ''.join(SectionHtmlDiff().iter_table(old, new, opcodes=opcodes))
+            rows = TABLE_ROW.findall(table)
+            if not old and not new or not any(tag != 'equal' for tag, *_ in opcodes):
+                # The "Empty File" / "No Differences Found" row comes first
+                rows = rows[1:]
+            self.assertEqual([row or None for row in rows], expected)
+
+class IterViewerTest(unittest.TestCase):
+    def test_payload_cannot_leave_its_script_element(self):
+        old = ['PARAGRAPH: Comment out a script with <!-- <script>', 'LINK: </script> (#)']
+        new = ['PARAGRAPH: Comment out a script with <!-- <script> and & entities', 'LINK: </script> (#)']
+        page = ''.join(SectionHtmlDiff().iter_viewer(old, new))
+        
+        start = page.index('<script type="application/json" id="diffData">') + len('<script type="application/json" id="diffData">')
+        end = page.index('</script>', start)
+        payload = page[start:end]
+        self.assertNotIn('<', payload)
+        self.assertNotIn('>', payload)
+        
+        data = json.loads(payload)
+        self.assertEqual(data['from'], old)
+        self.assertEqual(data['to_count'], len(new))
+        self.assertEqual([op[5] for op in data['ops'] if op[0] != 'equal'], [new[:1]])
+
+if __name__ == '__main__':
+    unittest.main()
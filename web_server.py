@@ -4,107 +4,276 @@ Simple Web Server for Webpage Tracker Files
 Provides easy access to webpage versions and diffs for the team.
 """
 
-from flask import Flask, render_template_string, send_from_directory, request
+from flask import Flask, Response, request
+import collections
+import functools
+import gzip
+import logging
+import mimetypes
+import operator
 import os
-from datetime import datetime
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
 
 app = Flask(__name__)
+logger = logging.getLogger(__name__)
+
+# When running behind Apache/lighttpd with mod_xsendfile, hand file bodies to the
+# front-end server so they go from the page cache to the socket without passing
+# through Python. Without it, files go through the WSGI server's file_wrapper.
+app.config['USE_X_SENDFILE'] = os.environ.get('WEBTRACKER_X_SENDFILE') == '1'
+
+# Worker threads for the production server started in __main__
+SERVER_THREADS = int(os.environ.get('WEBTRACKER_THREADS', '8'))
 
 # Configuration
 WEBPAGE_VERSIONS_DIR = 'webpage_versions'
 DIFFS_DIR = 'diffs'
 LOGS_DIR = 'logs'
 
-def get_file_info(file_path):
+# Resolved once; used to show absolute paths relative to the working directory
+_CWD_PREFIX = os.path.join(os.getcwd(), '')
+
+# Directory listings are reused until the tree changes (or this many seconds pass,
+# to pick up files overwritten in place, which do not bump directory mtimes)
+LISTING_CACHE_MAX_AGE = 300
+
+_listing_cache = {}
+_listing_cache_lock = threading.Lock()
+
+# Per-directory listings: path -> (mtime_ns, subdirectory paths, HTML file paths)
+_directory_cache = {}
+
+# Directories modified within this window are rescanned on every visit
+DIRECTORY_SETTLE_NS = 2_000_000_000
+
+# Formatted file details are memoized per (path, size, mtime)
+FILE_INFO_CACHE_SIZE = 8192
+
+# stat() releases the GIL, so file metadata is collected on a small thread pool
+# to overlap syscall latency on slow or network-mounted storage
+STAT_WORKERS = 16
+_stat_executor = ThreadPoolExecutor(max_workers=STAT_WORKERS)
+
+# Dashboard, versions and diffs pages are re-rendered in the background this often (seconds)
+PAGE_REFRESH_INTERVAL = 10
+
+_rendered_pages = {}
+_page_thread = None
+_page_lock = threading.Lock()
+
+# Seconds browsers may reuse a served file before revalidating it
+FILE_CACHE_MAX_AGE = 3600
+
+# Block size handed to wsgi.file_wrapper when streaming files
+FILE_CHUNK_SIZE = 1 << 20
+
+# Pre-compressed copies stored next to data files, in order of preference:
+# (Content-Encoding, file suffix). The tracker writes both for diffs; other
+# HTML files get a .gz copy written in the background on first request.
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_precompress_executor = ThreadPoolExecutor(max_workers=1)
+_precompress_pending = set()
+_precompress_failed = set()
+_precompress_lock = threading.Lock()
+
+# Generated pages are gzipped for clients that accept it
+COMPRESS_MIMETYPES = {'text/html', 'text/plain', 'application/json'}
+COMPRESS_LEVEL = 5
+COMPRESS_MIN_SIZE = 1024
+
+# Display fields for one file; a tuple is much smaller than a dict per file
+FileInfo = collections.namedtuple('FileInfo', 'name size modified path')
+
+def get_file_info(file_path, stat=None):
     """Get file information for display."""
-    stat = file_path.stat()
-    try:
-        relative_path = str(file_path.relative_to(Path.cwd()))
-    except ValueError:
-        # Handle case where file is not in current directory
-        relative_path = str(file_path)
-    return {
-        'name': file_path.name,
-        'size': f"{stat.st_size:,} bytes",
-        'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-        'path': relative_path
-    }
+    file_path = os.fspath(file_path)
+    if stat is None:
+        stat = os.stat(file_path)
+    return format_file_info(file_path, stat.st_size, stat.st_mtime)
+
+@functools.lru_cache(maxsize=FILE_INFO_CACHE_SIZE)
+def format_file_info(file_path, size, mtime):
+    """Format display fields for a file; memoized since unchanged files repeat across scans."""
+    # Paths outside the current directory are shown as given
+    if file_path.startswith(_CWD_PREFIX):
+        relative_path = file_path[len(_CWD_PREFIX):]
+    else:
+        relative_path = file_path
+    return FileInfo(
+        name=os.path.basename(file_path),
+        size=f"{size:,} bytes",
+        modified=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime)),
+        path=relative_path
+    )
+
+def list_directory(path):
+    """Return (mtime_ns, subdirectory paths, HTML file paths) for one directory.
+    
+    The entries are reused until the directory's own mtime changes, so
+    unchanged directories cost a single stat instead of a scandir.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _directory_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached
+    
+    subdirs = []
+    html_files = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith('.html') and entry.is_file():
+                html_files.append(entry.path)
+    listing = (mtime, subdirs, html_files)
+    
+    # A directory written to just now may change again without its (possibly
+    # coarse) mtime moving, so only cache once it has settled
+    if time.time_ns() - mtime > DIRECTORY_SETTLE_NS:
+        _directory_cache[path] = listing
+    return listing
+
+def get_tree_signature(directory):
+    """Return the newest directory mtime under a directory tree.
+
+    Adding or removing a file updates its parent directory's mtime, so this
+    detects new versions and diffs without stat-ing every file.
+    """
+    if not os.path.exists(directory):
+        return None
+    latest = 0
+    stack = [directory]
+    while stack:
+        try:
+            mtime, subdirs, _ = list_directory(stack.pop())
+        except OSError:
+            continue
+        latest = max(latest, mtime)
+        stack.extend(subdirs)
+    return latest
+
+def get_cached_scan(kind, directory, scan):
+    """Return scan(directory), reusing the cached result while the tree is unchanged."""
+    key = (kind, directory)
+    signature = get_tree_signature(directory)
+    now = time.monotonic()
+    with _listing_cache_lock:
+        cached = _listing_cache.get(key)
+        if cached and cached[0] == signature and now - cached[1] < LISTING_CACHE_MAX_AGE:
+            return cached[2]
+    
+    result = scan(directory)
+    with _listing_cache_lock:
+        _listing_cache[key] = (signature, now, result)
+    return result
 
 def list_html_files(directory):
-    """List all HTML files in a directory recursively."""
-    files = []
-    if os.path.exists(directory):
-        for root, dirs, filenames in os.walk(directory):
-            for filename in filenames:
-                if filename.endswith('.html'):
-                    file_path = Path(root) / filename
-                    files.append(get_file_info(file_path))
-    return sorted(files, key=lambda x: x['modified'], reverse=True)
-
-def build_directory_tree(directory):
-    """Build a hierarchical tree structure for a directory."""
-    tree = {}
-    if os.path.exists(directory):
-        for root, dirs, filenames in os.walk(directory):
-            # Get relative path from base directory
-            rel_path = os.path.relpath(root, directory)
-            if rel_path == '.':
-                rel_path = ''
-            
-            # Create path components
-            path_parts = rel_path.split(os.sep) if rel_path else []
-            
-            # Navigate to the correct level in the tree
-            current_level = tree
-            for part in path_parts:
-                if part not in current_level:
-                    current_level[part] = {'files': [], 'subdirs': {}}
-                current_level = current_level[part]['subdirs']
-            
-            # Add files to current level
-            for filename in filenames:
-                if filename.endswith('.html'):
-                    file_path = Path(root) / filename
-                    file_info = get_file_info(file_path)
-                    current_level[filename] = file_info
+    """List all HTML files in a directory recursively as (mtime, path, stat), newest first."""
+    return get_cached_scan('files', directory, scan_html_files)
+
+def count_html_files(directory):
+    """Count the HTML files under a directory without building their file info."""
+    return get_cached_scan('count', directory, lambda d: sum(1 for _ in iter_html_paths(d)))
+
+def scan_html_files(directory):
+    """Scan a directory recursively for HTML files, newest first by raw mtime.
     
-    return tree
+    Display fields are left to get_file_info for the entries actually shown.
+    """
+    paths = list(iter_html_paths(directory))
+    files = [(st.st_mtime, path, st) for path, st in zip(paths, _stat_executor.map(os.stat, paths))]
+    files.sort(key=operator.itemgetter(0), reverse=True)
+    return files
+
+def iter_html_paths(directory):
+    """Yield the paths of all HTML files under a directory."""
+    if not os.path.exists(directory):
+        return
+    stack = [directory]
+    while stack:
+        _, subdirs, html_files = list_directory(stack.pop())
+        yield from html_files
+        stack.extend(subdirs)
+
+def build_tree_html(directory):
+    """Render a directory tree as HTML, reusing the cached markup while the tree is unchanged."""
+    return get_cached_scan('tree', directory, scan_tree_html)
 
-def render_tree_html(tree, base_path='', level=0):
-    """Render the directory tree as HTML."""
-    html = ''
+def scan_tree_html(directory):
+    """Walk a directory with os.scandir and render its tree as HTML in the same pass."""
+    buf = bytearray()
+    if os.path.exists(directory):
+        render_tree_level(directory, buf, 0)
+    return buf.decode('utf-8')
+
+@functools.lru_cache(maxsize=None)
+def tree_fragments(level):
+    """Pre-encode the constant markup around names and file info for one tree level."""
     indent = '  ' * level
+    fragments = (
+        # Folder: open, name, mid, children, close
+        f'{indent}<div class="tree-folder">\n'
+        f'{indent}  <div class="tree-folder-header" onclick="toggleFolder(this)">\n'
+        f'{indent}    <span class="tree-icon">📁</span>\n'
+        f'{indent}    <span class="tree-name">',
+        f'</span>\n'
+        f'{indent}  </div>\n'
+        f'{indent}  <div class="tree-folder-content">\n',
+        f'{indent}  </div>\n'
+        f'{indent}</div>\n',
+        # File: open, path, link end, name, info, separator, modified, close
+        f'{indent}<div class="tree-file">\n'
+        f'{indent}  <div class="tree-file-header">\n'
+        f'{indent}    <span class="tree-icon">📄</span>\n'
+        f'{indent}    <a href="/file/',
+        '" target="_blank" class="tree-name">',
+        f'</a>\n'
+        f'{indent}    <span class="tree-info">📏 ',
+        ' | 🕒 ',
+        f'</span>\n'
+        f'{indent}  </div>\n'
+        f'{indent}</div>\n',
+    )
+    return tuple(fragment.encode('utf-8') for fragment in fragments)
+
+def render_tree_level(path, buf, level):
+    """Append the UTF-8 HTML for the subdirectories and HTML files under path to buf."""
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    (folder_open, folder_mid, folder_close,
+     file_open, file_link_end, file_info_open, file_sep, file_close) = tree_fragments(level)
     
-    for name, content in sorted(tree.items()):
-        if isinstance(content, dict) and 'files' in content:
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir(follow_symlinks=False):
             # This is a directory
-            html += f'{indent}<div class="tree-folder">\n'
-            html += f'{indent}  <div class="tree-folder-header" onclick="toggleFolder(this)">\n'
-            html += f'{indent}    <span class="tree-icon">📁</span>\n'
-            html += f'{indent}    <span class="tree-name">{name}</span>\n'
-            html += f'{indent}  </div>\n'
-            html += f'{indent}  <div class="tree-folder-content">\n'
-            html += render_tree_html(content['subdirs'], f"{base_path}/{name}" if base_path else name, level + 1)
-            html += f'{indent}  </div>\n'
-            html += f'{indent}</div>\n'
-        else:
+            buf += folder_open
+            buf += name.encode('utf-8')
+            buf += folder_mid
+            render_tree_level(entry.path, buf, level + 1)
+            buf += folder_close
+        elif name.endswith('.html') and entry.is_file():
             # This is a file
-            file_info = content
-            html += f'{indent}<div class="tree-file">\n'
-            html += f'{indent}  <div class="tree-file-header">\n'
-            html += f'{indent}    <span class="tree-icon">📄</span>\n'
-            html += f'{indent}    <a href="/file/{file_info["path"]}" target="_blank" class="tree-name">{name}</a>\n'
-            html += f'{indent}    <span class="tree-info">📏 {file_info["size"]} | 🕒 {file_info["modified"]}</span>\n'
-            html += f'{indent}  </div>\n'
-            html += f'{indent}</div>\n'
-    
-    return html
+            file_info = get_file_info(entry.path, entry.stat())
+            buf += file_open
+            buf += file_info.path.encode('utf-8')
+            buf += file_link_end
+            buf += name.encode('utf-8')
+            buf += file_info_open
+            buf += file_info.size.encode('utf-8')
+            buf += file_sep
+            buf += file_info.modified.encode('utf-8')
+            buf += file_close
 
-@app.route('/')
-def index():
-    """Main dashboard page."""
-    html = '''
+INDEX_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -165,11 +334,11 @@ def index():
             
             <div class="stats">
                 <div class="stat-card">
-                    <div class="stat-number">''' + str(len(list_html_files(WEBPAGE_VERSIONS_DIR))) + '''</div>
+                    <div class="stat-number">{{ versions_count }}</div>
                     <div class="stat-label">Total Webpage Versions</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">''' + str(len(list_html_files(DIFFS_DIR))) + '''</div>
+                    <div class="stat-number">{{ diffs_count }}</div>
                     <div class="stat-label">Generated Diffs</div>
                 </div>
             </div>
@@ -177,40 +346,40 @@ def index():
             <div class="section">
                 <h2>📁 Recent Webpage Versions</h2>
                 <ul class="file-list">
-    '''
-    
-    # Get recent files
-    recent_files = list_html_files(WEBPAGE_VERSIONS_DIR)[:10]
-    
-    for file_info in recent_files:
-        html += f'''
+                    {% for file_info in recent_files %}
                     <li class="file-item">
                         <div class="file-name">
-                            <a href="/file/{file_info['path']}" target="_blank">{file_info['name']}</a>
+                            <a href="/file/{{ file_info.path }}" target="_blank">{{ file_info.name }}</a>
                         </div>
                         <div class="file-info">
-                            📁 {file_info['path']} | 📏 {file_info['size']} | 🕒 {file_info['modified']}
+                            📁 {{ file_info.path }} | 📏 {{ file_info.size }} | 🕒 {{ file_info.modified }}
                         </div>
                     </li>
-        '''
-    
-    html += '''
+                    {% endfor %}
                 </ul>
             </div>
         </div>
     </body>
     </html>
     '''
-    
-    return html
+_INDEX_TPL = app.jinja_env.from_string(INDEX_HTML)
 
-@app.route('/versions')
-def versions():
-    """List all webpage versions in tree structure."""
-    tree = build_directory_tree(WEBPAGE_VERSIONS_DIR)
-    tree_html = render_tree_html(tree)
+@app.route('/')
+def index():
+    """Main dashboard page."""
+    return get_rendered_page('index')
+
+def render_index():
+    """Render the dashboard page."""
+    versions = list_html_files(WEBPAGE_VERSIONS_DIR)
     
-    html = '''
+    return _INDEX_TPL.render(
+        versions_count=len(versions),
+        diffs_count=count_html_files(DIFFS_DIR),
+        recent_files=[get_file_info(path, st) for _, path, st in versions[:10]]
+    )
+
+VERSIONS_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -316,16 +485,20 @@ def versions():
     </body>
     </html>
     '''
-    
-    return render_template_string(html, tree_html=tree_html)
+_VERSIONS_TPL = app.jinja_env.from_string(VERSIONS_HTML)
 
-@app.route('/diffs')
-def diffs():
-    """List all diff files in tree structure."""
-    tree = build_directory_tree(DIFFS_DIR)
-    tree_html = render_tree_html(tree)
+@app.route('/versions')
+def versions():
+    """List all webpage versions in tree structure."""
+    return get_rendered_page('versions')
+
+def render_versions():
+    """Render the versions tree page."""
+    tree_html = build_tree_html(WEBPAGE_VERSIONS_DIR)
     
-    html = '''
+    return _VERSIONS_TPL.render(tree_html=tree_html)
+
+DIFFS_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -431,20 +604,20 @@ def diffs():
     </body>
     </html>
     '''
-    
-    return render_template_string(html, tree_html=tree_html)
+_DIFFS_TPL = app.jinja_env.from_string(DIFFS_HTML)
 
-@app.route('/logs')
-def logs():
-    """Show recent logs."""
-    log_files = []
-    if os.path.exists(LOGS_DIR):
-        for filename in os.listdir(LOGS_DIR):
-            if filename.endswith('.log'):
-                file_path = Path(LOGS_DIR) / filename
-                log_files.append(get_file_info(file_path))
+@app.route('/diffs')
+def diffs():
+    """List all diff files in tree structure."""
+    return get_rendered_page('diffs')
+
+def render_diffs():
+    """Render the diffs tree page."""
+    tree_html = build_tree_html(DIFFS_DIR)
     
-    html = '''
+    return _DIFFS_TPL.render(tree_html=tree_html)
+
+LOGS_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -484,13 +657,21 @@ def logs():
     </body>
     </html>
     '''
+_LOGS_TPL = app.jinja_env.from_string(LOGS_HTML)
+
+@app.route('/logs')
+def logs():
+    """Show recent logs."""
+    log_files = []
+    if os.path.exists(LOGS_DIR):
+        with os.scandir(LOGS_DIR) as it:
+            for entry in it:
+                if entry.name.endswith('.log') and entry.is_file():
+                    log_files.append(get_file_info(entry.path, entry.stat()))
     
-    return render_template_string(html, files=log_files)
+    return _LOGS_TPL.render(files=log_files)
 
-@app.route('/archive')
-def archive():
-    """Display archived historical data."""
-    html = '''
+ARCHIVE_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -530,89 +711,276 @@ def archive():
                 <p>This page displays historical data that was archived before implementing the new Excel-based structure. 
                 The archive preserves the old domain-based organization for reference purposes.</p>
             </div>
-    '''
-    
-    # Find archive directories
-    archive_dirs = []
-    for item in Path('.').iterdir():
-        if item.is_dir() and item.name.startswith('historical_archive_'):
-            archive_dirs.append(item)
-    
-    if not archive_dirs:
-        html += '''
-            <div class="no-archive">
-                <h3>📦 No Historical Archives Found</h3>
-                <p>No historical archives have been created yet. Historical data will appear here after running the hybrid deployment.</p>
-            </div>
-        '''
-    else:
-        # Sort archives by creation time (newest first)
-        archive_dirs.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-        
-        for archive_dir in archive_dirs:
-            archive_name = archive_dir.name
-            archive_date = datetime.fromtimestamp(archive_dir.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            
-            html += f'''
+            {% for archive in archives %}
                 <div class="section">
-                    <h2>📦 {archive_name}</h2>
-                    <p><strong>Created:</strong> {archive_date}</p>
-            '''
-            
-            # Show archived webpage versions
-            archive_versions_dir = archive_dir / 'webpage_versions'
-            if archive_versions_dir.exists():
-                html += '<h3>📁 Archived Webpage Versions</h3><ul class="file-list">'
-                
-                for version_file in archive_versions_dir.rglob('*.html'):
-                    file_info = get_file_info(version_file)
-                    html += f'''
+                    <h2>📦 {{ archive.name }}</h2>
+                    <p><strong>Created:</strong> {{ archive.created }}</p>
+                    {% if archive.versions is not none %}
+                    <h3>📁 Archived Webpage Versions</h3><ul class="file-list">
+                        {% for file_info in archive.versions %}
                         <li class="file-item">
                             <div class="file-name">
-                                <a href="/file/{file_info['path']}" target="_blank">{file_info['name']}</a>
+                                <a href="/file/{{ file_info.path }}" target="_blank">{{ file_info.name }}</a>
                             </div>
                             <div class="file-info">
-                                <div class="file-path">📁 {file_info['path']}</div>
-                                📏 {file_info['size']} | 🕒 {file_info['modified']}
+                                <div class="file-path">📁 {{ file_info.path }}</div>
+                                📏 {{ file_info.size }} | 🕒 {{ file_info.modified }}
                             </div>
                         </li>
-                    '''
-                html += '</ul>'
-            
-            # Show archived diffs
-            archive_diffs_dir = archive_dir / 'diffs'
-            if archive_diffs_dir.exists():
-                html += '<h3>🔄 Archived Diffs</h3><ul class="file-list">'
-                
-                for diff_file in archive_diffs_dir.rglob('*.html'):
-                    file_info = get_file_info(diff_file)
-                    html += f'''
+                        {% endfor %}
+                    </ul>
+                    {% endif %}
+                    {% if archive.diffs is not none %}
+                    <h3>🔄 Archived Diffs</h3><ul class="file-list">
+                        {% for file_info in archive.diffs %}
                         <li class="file-item">
                             <div class="file-name">
-                                <a href="/file/{file_info['path']}" target="_blank">{file_info['name']}</a>
+                                <a href="/file/{{ file_info.path }}" target="_blank">{{ file_info.name }}</a>
                             </div>
                             <div class="file-info">
-                                <div class="file-path">📁 {file_info['path']}</div>
-                                📏 {file_info['size']} | 🕒 {file_info['modified']}
+                                <div class="file-path">📁 {{ file_info.path }}</div>
+                                📏 {{ file_info.size }} | 🕒 {{ file_info.modified }}
                             </div>
                         </li>
-                    '''
-                html += '</ul>'
-            
-            html += '</div>'
-    
-    html += '''
+                        {% endfor %}
+                    </ul>
+                    {% endif %}
+                </div>
+            {% else %}
+            <div class="no-archive">
+                <h3>📦 No Historical Archives Found</h3>
+                <p>No historical archives have been created yet. Historical data will appear here after running the hybrid deployment.</p>
+            </div>
+            {% endfor %}
         </div>
     </body>
     </html>
     '''
+_ARCHIVE_TPL = app.jinja_env.from_string(ARCHIVE_HTML)
+
+def walk_html_file_info(directory):
+    """Get file info for every HTML file under a directory.
+    
+    os.fwalk keeps each directory open, so files are stat'ed relative to its
+    fd instead of resolving the full path from the top every time.
+    """
+    if not hasattr(os, 'fwalk'):
+        # Windows has no dir_fd support
+        return [get_file_info(f) for f in Path(directory).rglob('*.html')]
     
-    return html
+    files = []
+    for root, _, filenames, root_fd in os.fwalk(directory):
+        for filename in filenames:
+            if filename.endswith('.html'):
+                files.append(get_file_info(os.path.join(root, filename), os.stat(filename, dir_fd=root_fd)))
+    return files
+
+@app.route('/archive')
+def archive():
+    """Display archived historical data."""
+    # Find archive directories
+    archive_dirs = []
+    for item in Path('.').iterdir():
+        if item.is_dir() and item.name.startswith('historical_archive_'):
+            archive_dirs.append(item)
+    
+    # Sort archives by creation time (newest first)
+    archive_dirs.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+    
+    archives = []
+    for archive_dir in archive_dirs:
+        archive_versions_dir = archive_dir / 'webpage_versions'
+        archive_diffs_dir = archive_dir / 'diffs'
+        archives.append({
+            'name': archive_dir.name,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(archive_dir.stat().st_mtime)),
+            'versions': walk_html_file_info(archive_versions_dir) if archive_versions_dir.exists() else None,
+            'diffs': walk_html_file_info(archive_diffs_dir) if archive_diffs_dir.exists() else None
+        })
+    
+    return _ARCHIVE_TPL.render(archives=archives)
+
+# Pages that only depend on the data directories, rendered off the request path
+PAGE_RENDERERS = {
+    'index': render_index,
+    'versions': render_versions,
+    'diffs': render_diffs
+}
+
+def render_pages():
+    """Render every page in PAGE_RENDERERS, as UTF-8 bytes and (if large enough) gzipped.
+    
+    The pages are the same for every request until the next refresh, so they
+    are compressed here once rather than by compress_response per request.
+    """
+    pages = {}
+    for name, render in PAGE_RENDERERS.items():
+        body = render().encode('utf-8')
+        compressed = gzip.compress(body, compresslevel=COMPRESS_LEVEL) if len(body) >= COMPRESS_MIN_SIZE else None
+        pages[name] = (body, compressed)
+    return pages
+
+def refresh_rendered_pages():
+    """Background loop that keeps the rendered pages up to date."""
+    global _rendered_pages
+    while True:
+        time.sleep(PAGE_REFRESH_INTERVAL)
+        try:
+            _rendered_pages = render_pages()
+        except Exception:
+            # Keep serving the previous pages until the next refresh succeeds;
+            # nothing restarts this thread, so it must never exit
+            logger.exception("Error re-rendering pages")
+
+def get_rendered_page(name):
+    """Return the latest rendering of a page, starting the refresher on first use."""
+    global _rendered_pages, _page_thread
+    with _page_lock:
+        if _page_thread is None:
+            _rendered_pages = render_pages()
+            _page_thread = threading.Thread(target=refresh_rendered_pages, name='page-renderer', daemon=True)
+            _page_thread.start()
+    body, compressed = _rendered_pages[name]
+    if compressed is not None and 'gzip' in request.accept_encodings:
+        response = Response(compressed, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    return response
+
+def file_etag(st):
+    """Cheap ETag from a file's modification time and size."""
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+def set_file_headers(response, st, max_age):
+    """Set the validator and caching headers shared by full and 304 file responses."""
+    response.last_modified = st.st_mtime
+    response.set_etag(file_etag(st))
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+
+def send_data_file(filepath, max_age, mimetype=None):
+    """Send a file through the WSGI server's file_wrapper so it can use sendfile().
+    
+    Without a server-provided wrapper, Werkzeug's FileWrapper streams the file
+    in FILE_CHUNK_SIZE reads. Conditional and Range requests are still honored.
+    """
+    # Same base directory and traversal protection as send_from_directory('.')
+    path = safe_join(app.root_path, filepath)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    
+    # Revalidations that still match are answered without opening the file
+    st = os.stat(path)
+    if request.if_none_match.contains_weak(file_etag(st)):
+        response = Response(status=304)
+        set_file_headers(response, st, max_age)
+        return response
+    
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    
+    f = open(path, 'rb')
+    st = os.fstat(f.fileno())
+    if app.config['USE_X_SENDFILE']:
+        f.close()
+        response = Response(mimetype=mimetype, direct_passthrough=True)
+        response.headers['X-Sendfile'] = path
+    else:
+        response = Response(wrap_file(request.environ, f, FILE_CHUNK_SIZE),
+                            mimetype=mimetype, direct_passthrough=True)
+    response.content_length = st.st_size
+    set_file_headers(response, st, max_age)
+    return response.make_conditional(request, accept_ranges=True, complete_length=st.st_size)
+
+def find_precompressed(path):
+    """Return the (encoding, suffix) of the best up-to-date compressed copy the client accepts."""
+    source_mtime = os.stat(path).st_mtime_ns
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if encoding not in request.accept_encodings:
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime_ns >= source_mtime:
+                return encoding, suffix
+        except OSError:
+            continue
+    return None
+
+def precompress_file(path):
+    """Write a gzipped copy next to a file, replacing any previous copy atomically."""
+    tmp_path = f"{path}.gz.{os.getpid()}.tmp"
+    try:
+        with open(path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, FILE_CHUNK_SIZE)
+        os.replace(tmp_path, f"{path}.gz")
+    except OSError:
+        # Data directories may be mounted read-only; keep serving uncompressed
+        with _precompress_lock:
+            _precompress_failed.add(os.path.dirname(path))
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    finally:
+        with _precompress_lock:
+            _precompress_pending.discard(path)
+
+def schedule_precompress(path):
+    """Queue a background gzip of a file unless one is pending or its directory is read-only."""
+    with _precompress_lock:
+        if path in _precompress_pending or os.path.dirname(path) in _precompress_failed:
+            return
+        _precompress_pending.add(path)
+    _precompress_executor.submit(precompress_file, path)
 
 @app.route('/file/<path:filepath>')
 def serve_file(filepath):
-    """Serve individual files."""
-    return send_from_directory('.', filepath)
+    """Serve individual files with ETag/Last-Modified so reloads can be answered with 304."""
+    # Logs keep growing, so browsers must revalidate them on every load
+    max_age = 0 if filepath.endswith('.log') else FILE_CACHE_MAX_AGE
+    
+    if not filepath.endswith('.html'):
+        return send_data_file(filepath, max_age)
+    
+    # Prefer an up-to-date pre-compressed copy of HTML files
+    path = safe_join(app.root_path, filepath)
+    if path is not None and os.path.isfile(path):
+        best = find_precompressed(path)
+        if best:
+            encoding, suffix = best
+            response = send_data_file(filepath + suffix, max_age, mimetype='text/html')
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+        if 'gzip' in request.accept_encodings and os.path.getsize(path) >= COMPRESS_MIN_SIZE:
+            schedule_precompress(path)
+    
+    response = send_data_file(filepath, max_age)
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Gzip generated text responses for clients that accept it."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code != 200
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080, debug=False) 
\ No newline at end of file
+    # Waitress serves requests from a thread pool in this one process, so the
+    # in-process caches and the page pre-render thread are shared by all of them
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=8080, threads=SERVER_THREADS) 
\ No newline at end of file
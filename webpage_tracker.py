@@ -3,19 +3,34 @@
 Webpage Change Tracker
 
 This script reads URLs from an Excel file, fetches webpage content daily,
-saves prettified HTML versions, and generates diffs between consecutive versions.
+saves self-contained HTML versions, and generates diffs between consecutive versions.
 Also extracts text content for translation references.
 """
 
 import os
 import sys
+import threading
+import base64
+import bisect
+import collections
+import gzip
+import itertools
+import brotli
+import json
 import logging
+import multiprocessing
+import re
 import requests
-import pandas as pd
-from datetime import datetime
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from hashlib import blake2b
+from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
-from difflib import HtmlDiff
+import lxml.html
+from lxml import etree
+from difflib import HtmlDiff, SequenceMatcher
 import time
 from pathlib import Path
 
@@ -30,6 +45,358 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pages tracked at the same time, and asset downloads (CSS/JS/images) in flight
+URL_WORKERS = 8
+ASSET_WORKERS = 16
+
+# Diffs are CPU-bound pure Python, so during a run they are built in worker processes
+DIFF_WORKERS = min(URL_WORKERS, os.cpu_count() or 1)
+
+# Hosts with pooled keep-alive connections (pages plus their asset CDNs)
+HOST_POOLS = 32
+
+# Rate limiting and gateway errors are usually gone a moment later
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Images (and CSS/JS files) larger than this keep their remote URL instead of being inlined
+MAX_IMAGE_BYTES = 5 << 20
+
+# Pages larger than this are not tracked, so one runaway response can't exhaust memory
+MAX_PAGE_BYTES = 50 << 20
+
+# A multiple of 3, so each chunk base64-encodes on its own without padding
+ASSET_CHUNK_SIZE = 3 * (64 << 10)
+
+# Sheet cells that are not absolute http(s) URLs are skipped before any fetching
+VALID_URL = re.compile(r'^https?://[^\s/?#]+[^\s]*$', re.IGNORECASE)
+
+# Analytics, tag manager and ad hosts (and their subdomains); their scripts and pixels
+# don't change a page's text, so they keep their remote URL instead of being downloaded
+IGNORED_ASSET_HOSTS = frozenset({
+    'googletagmanager.com',
+    'google-analytics.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'connect.facebook.net',
+    'hotjar.com',
+    'clarity.ms',
+    'bat.bing.com',
+    'snap.licdn.com',
+    'analytics.tiktok.com',
+})
+
+# Asset downloads remembered across pages within a run
+ASSET_MEMO_SIZE = 512
+
+# Diffs are written once and served many times, so spend the CPU on maximum compression
+BROTLI_QUALITY = 11
+
+# Returned by fetch_webpage when the server answers a conditional request with 304
+NOT_MODIFIED = object()
+
+# Per-site sidecars with the ETag/Last-Modified of the last fetch, and the
+# CSS/JS/image contents embedded into it
+VALIDATORS_FILE = '.meta.json'
+ASSET_CACHE_FILE = '.assets.json'
+
+# Embedded assets are reused for this long before being downloaded again
+ASSET_CACHE_MAX_AGE = 7 * 24 * 3600
+
+# Stands in for the diff table while the pages around it are rendered
+DIFF_PLACEHOLDER = '\0diff-table\0'
+
+# Diff pages are encoded and written in pieces of about this many characters
+DIFF_WRITE_CHUNK = 1 << 20
+
+# Replaced sections at least this similar get intraline highlighting (difflib's own cutoff)
+INTRALINE_CUTOFF = 0.75
+
+# 'json' writes the diff as opcodes rendered by a small script in the page;
+# 'table' writes the full pre-rendered HtmlDiff table as before
+DIFF_FORMAT = os.environ.get('WEBTRACKER_DIFF_FORMAT', 'json')
+
+# Builds the same table as SectionHtmlDiff.iter_table from the JSON payload. It runs
+# inline, before DOMContentLoaded, so the diff page's navigation and search find the rows.
+DIFF_VIEWER_SCRIPT = """
+    <script>
+    (function() {
+        const data = JSON.parse(document.getElementById('diffData').textContent);
+        const body = document.getElementById('difflib_chg_to0__top').tBodies[0];
+        const prefix = 'difflib_chg_to0__';
+        const hunks = data.ops.filter(op => op[0] !== 'equal').length;
+        const rows = document.createDocumentFragment();
+        function td(cls, content, id) {
+            const cell = document.createElement('td');
+            if (cls) cell.className = cls; else cell.noWrap = true;
+            if (id) cell.id = id;
+            if (typeof content === 'string') cell.textContent = content.replace(/ /g, '\\u00a0');
+            else if (content) cell.appendChild(content);
+            return cell;
+        }
+        function span(cls, text) {
+            const el = document.createElement('span');
+            el.className = cls;
+            el.textContent = text.replace(/ /g, '\\u00a0');
+            return el;
+        }
+        function link(target, text) {
+            const a = document.createElement('a');
+            a.href = '#' + prefix + target;
+            a.textContent = text;
+            return a;
+        }
+        function addRow(next, nextId, from, to, fromText, toText) {
+            const row = document.createElement('tr');
+            row.append(td('diff_next', next && next(), nextId),
+                       td('diff_header', from === null ? '' : String(from + 1), from === null ? null : 'from0_' + (from + 1)),
+                       td(null, fromText),
+                       td('diff_next', next && next()),
+                       td('diff_header', to === null ? '' : String(to + 1), to === null ? null : 'to0_' + (to + 1)),
+                       td(null, toText));
+            rows.appendChild(row);
+            return row;
+        }
+        if (!data.from.length && !data.to_count) addRow(null, null, null, null, 'Empty File', 'Empty File');
+        else if (!hunks) addRow(null, null, null, null, 'No Differences Found', 'No Differences Found');
+        let hunk = 0, first = true;
+        for (const [tag, i1, i2, j1, j2, lines] of data.ops) {
+            const count = tag === 'equal' ? i2 - i1 : Math.max(i2 - i1, j2 - j1);
+            for (let k = 0; k < count; k++) {
+                let next = null, nextId = null;
+                if (k === 0 && tag !== 'equal') {
+                    const n = hunk++;
+                    next = n + 1 < hunks ? () => link(n + 1, 'n') : () => link('top', 't');
+                    nextId = prefix + n;
+                } else if (first && hunks) {
+                    next = () => link(0, 'f');
+                }
+                first = false;
+                const from = i1 + k < i2 ? i1 + k : null, to = j1 + k < j2 ? j1 + k : null;
+                if (tag === 'equal') addRow(next, nextId, from, to, data.from[from], data.from[from]);
+                else addRow(next, nextId, from, to, from === null ? '' : span('diff_sub', data.from[from]),
+                            to === null ? '' : span('diff_add', lines[k])).className =
+                        'has-change ' + (from === null ? 'added' : to === null ? 'removed' : 'changed');
+            }
+        }
+        body.appendChild(rows);
+    })();
+    </script>"""
+
+# Heading levels in the order their text sections are listed
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# Elements extract_text_content looks at, collected in one pass over the document
+TEXT_TAGS = ('title',) + HEADING_TAGS + ('p', 'ul', 'ol', 'li', 'a')
+CLOSING_DOCUMENT_TAGS = re.compile(rb'</(?:body|html)\s*>', re.IGNORECASE)
+
+# Saved versions are UTF-8 whatever their <meta charset> says, so pages are parsed as
+# UTF-8 bytes; lxml refuses str input that carries an XML encoding declaration
+UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+def section_opcodes(fromlines, tolines):
+    """Match two lists of text sections, running SequenceMatcher only between the common ends.
+    
+    Daily versions usually differ in a handful of sections, so trimming the
+    identical leading and trailing lines first leaves very little to match.
+    Returns opcodes in SequenceMatcher.get_opcodes() form.
+    """
+    end = min(len(fromlines), len(tolines))
+    lo = 0
+    while lo < end and fromlines[lo] == tolines[lo]:
+        lo += 1
+    tail = 0
+    while tail < end - lo and fromlines[-1 - tail] == tolines[-1 - tail]:
+        tail += 1
+    from_hi, to_hi = len(fromlines) - tail, len(tolines) - tail
+    
+    # Match small ints standing for the sections, so comparisons never look at the text.
+    # Repeated sections ("LINK: Learn more") are common on these pages and make good
+    # anchors, so they are not treated as junk the way autojunk would
+    ids = {}
+    from_ids = [ids.setdefault(line, len(ids)) for line in fromlines[lo:from_hi]]
+    to_ids = [ids.setdefault(line, len(ids)) for line in tolines[lo:to_hi]]
+    
+    opcodes = [('equal', 0, lo, 0, lo)] if lo else []
+    matcher = SequenceMatcher(None, from_ids, to_ids, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        opcodes.append((tag, i1 + lo, i2 + lo, j1 + lo, j2 + lo))
+    if tail:
+        opcodes.append(('equal', from_hi, len(fromlines), to_hi, len(tolines)))
+    return opcodes
+
+class SectionHtmlDiff(HtmlDiff):
+    """HtmlDiff with a side-by-side table that stays fast on rewritten pages.
+    
+    HtmlDiff searches every block of replaced lines for the most similar pair,
+    which is quadratic in the block size and takes tens of seconds when a large
+    part of a page is rewritten. Here replaced sections are paired in order and
+    only pairs similar enough to be edits get intraline highlighting. The table
+    keeps HtmlDiff's markup, so make_file() and the diff page styles still apply.
+    """
+    
+    def make_table(self, fromlines, tolines, fromdesc='', todesc='', context=False, numlines=5):
+        """Return a side-by-side HTML table of the differences (context is not supported)."""
+        return ''.join(self.iter_table(fromlines, tolines, fromdesc, todesc))
+    
+    def iter_file(self, fromlines, tolines, fromdesc='', todesc='', charset='utf-8', opcodes=None):
+        """Yield the make_file() page in pieces, so large diffs can be written as they are built."""
+        page = self._file_template % dict(styles=self._styles, legend=self._legend,
+                                          table=DIFF_PLACEHOLDER, charset=charset)
+        head, tail = page.split(DIFF_PLACEHOLDER)
+        yield head
+        yield from self.iter_table(fromlines, tolines, fromdesc, todesc, opcodes)
+        yield tail
+    
+    def iter_table(self, fromlines, tolines, fromdesc='', todesc='', opcodes=None):
+        """Yield the side-by-side HTML table one row at a time.
+        
+        opcodes are those of section_opcodes(fromlines, tolines), if already computed.
+        """
+        prefix = 'difflib_chg_to0__'
+        if opcodes is None:
+            opcodes = section_opcodes(fromlines, tolines)
+        # Opcode index -> hunk number, for the (n)ext/(t)op links between changes
+        hunks = {i: n for n, i in enumerate(i for i, opcode in enumerate(opcodes) if opcode[0] != 'equal')}
+        
+        yield (
+            f'\n    <table class="diff" id="{prefix}top"\n'
+            '           cellspacing="0" cellpadding="0" rules="groups" >\n'
+            '        <colgroup></colgroup> <colgroup></colgroup> <colgroup></colgroup>\n'
+            '        <colgroup></colgroup> <colgroup></colgroup> <colgroup></colgroup>\n'
+            f'        <thead><tr><th class="diff_next"><br /></th><th colspan="2" class="diff_header">{fromdesc}</th>'
+            f'<th class="diff_next"><br /></th><th colspan="2" class="diff_header">{todesc}</th></tr></thead>\n'
+            '        <tbody>\n'
+        )
+        
+        if not fromlines and not tolines:
+            yield ('            <tr><td class="diff_next"></td><td class="diff_header"></td><td nowrap="nowrap">Empty File</td>'
+                   '<td class="diff_next"></td><td class="diff_header"></td><td nowrap="nowrap">Empty File</td></tr>\n')
+        elif not hunks:
+            yield ('            <tr><td class="diff_next"></td><td class="diff_header"></td><td nowrap="nowrap">No Differences Found</td>'
+                   '<td class="diff_next"></td><td class="diff_header"></td><td nowrap="nowrap">No Differences Found</td></tr>\n')
+        
+        first_row = True
+        for i, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+            if tag == 'equal':
+                pairs = ((i1 + k, j1 + k, self._escape(fromlines[i1 + k]), self._escape(tolines[j1 + k]))
+                         for k in range(i2 - i1))
+            else:
+                pairs = (self._format_pair(fromlines, tolines, i1 + k if i1 + k < i2 else None,
+                                           j1 + k if j1 + k < j2 else None)
+                         for k in range(max(i2 - i1, j2 - j1)))
+            
+            for k, (from_index, to_index, from_text, to_text) in enumerate(pairs):
+                from_next = to_next = '<td class="diff_next"></td>'
+                if k == 0 and i in hunks:
+                    n = hunks[i]
+                    link = f'<a href="#{prefix}{n + 1}">n</a>' if n + 1 < len(hunks) else f'<a href="#{prefix}top">t</a>'
+                    from_next = f'<td class="diff_next" id="{prefix}{n}">{link}</td>'
+                    to_next = f'<td class="diff_next">{link}</td>'
+                elif first_row and hunks:
+                    from_next = to_next = f'<td class="diff_next"><a href="#{prefix}0">f</a></td>'
+                first_row = False
+                from_header = f'<td class="diff_header" id="from0_{from_index + 1}">{from_index + 1}</td>' if from_index is not None else '<td class="diff_header"></td>'
+                to_header = f'<td class="diff_header" id="to0_{to_index + 1}">{to_index + 1}</td>' if to_index is not None else '<td class="diff_header"></td>'
+                row_class = self._row_class(from_index, to_index) if tag != 'equal' else ''
+                yield (f'            <tr{row_class}>{from_next}{from_header}<td nowrap="nowrap">{from_text}</td>'
+                       f'{to_next}{to_header}<td nowrap="nowrap">{to_text}</td></tr>\n')
+        
+        yield ('        </tbody>\n'
+               '    </table>')
+    
+    def iter_viewer(self, fromlines, tolines, fromdesc='', todesc='', opcodes=None):
+        """Yield an empty diff table with the opcodes as JSON and the script that fills it in.
+        
+        Unchanged lines are stored once, only changed new lines are added to the
+        old ones, and no markup is written per cell, so the page is a fraction of
+        the size of the pre-rendered table. Changed sections are marked whole,
+        without intraline highlighting.
+        """
+        if opcodes is None:
+            opcodes = section_opcodes(fromlines, tolines)
+        ops = [[tag, i1, i2, j1, j2] if tag == 'equal' else [tag, i1, i2, j1, j2, tolines[j1:j2]]
+               for tag, i1, i2, j1, j2 in opcodes]
+        data = json.dumps({'from': fromlines, 'to_count': len(tolines), 'ops': ops},
+                          ensure_ascii=False, separators=(',', ':'))
+        
+        yield (
+            '\n    <table class="diff" id="difflib_chg_to0__top" cellspacing="0" cellpadding="0" rules="groups" >\n'
+            f'        <thead><tr><th class="diff_next"><br /></th><th colspan="2" class="diff_header">{fromdesc}</th>'
+            f'<th class="diff_next"><br /></th><th colspan="2" class="diff_header">{todesc}</th></tr></thead>\n'
+            '        <tbody></tbody>\n'
+            '    </table>\n'
+            '    <script type="application/json" id="diffData">'
+        )
+        # Section text is decoded, so it can hold "</script>" or "<!--" that would end the
+        # element early or stop its real end tag from closing it; escaped, no markup is left
+        yield data.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+        yield '</script>'
+        yield DIFF_VIEWER_SCRIPT
+    
+    def _format_pair(self, fromlines, tolines, from_index, to_index):
+        """Mark up one row of a changed block; either side may be missing."""
+        if from_index is None:
+            return None, to_index, '', self._span('diff_add', tolines[to_index])
+        if to_index is None:
+            return from_index, None, self._span('diff_sub', fromlines[from_index]), ''
+        
+        old, new = fromlines[from_index], tolines[to_index]
+        matcher = SequenceMatcher(None, old, new)
+        if matcher.real_quick_ratio() < INTRALINE_CUTOFF or matcher.quick_ratio() < INTRALINE_CUTOFF or matcher.ratio() < INTRALINE_CUTOFF:
+            return from_index, to_index, self._span('diff_sub', old), self._span('diff_add', new)
+        
+        from_parts, to_parts = [], []
+        for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+            if tag == 'equal':
+                from_parts.append(self._escape(old[a1:a2]))
+                to_parts.append(self._escape(new[b1:b2]))
+            elif tag == 'replace':
+                from_parts.append(self._span('diff_chg', old[a1:a2]))
+                to_parts.append(self._span('diff_chg', new[b1:b2]))
+            elif tag == 'delete':
+                from_parts.append(self._span('diff_sub', old[a1:a2]))
+            else:
+                to_parts.append(self._span('diff_add', new[b1:b2]))
+        return from_index, to_index, ''.join(from_parts), ''.join(to_parts)
+    
+    def _row_class(self, from_index, to_index):
+        """Return the class attribute marking a changed row for the diff page's script and styles.
+        
+        A row with both sides is a changed section, one with only a new or old side
+        was added or removed; DIFF_VIEWER_SCRIPT classifies its rows the same way.
+        """
+        if from_index is None:
+            kind = 'added'
+        elif to_index is None:
+            kind = 'removed'
+        else:
+            kind = 'changed'
+        return f' class="has-change {kind}"'
+    
+    def _span(self, css_class, text):
+        """Wrap escaped text in a change marker span."""
+        return f'<span class="{css_class}">{self._escape(text)}</span>'
+    
+    def _escape(self, text):
+        """Escape text for a table cell the way HtmlDiff does."""
+        return text.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;').replace(' ', '&nbsp;')
+
+# The tracker a diff worker process builds its diffs with (see init_diff_worker)
+_diff_tracker = None
+
+def init_diff_worker():
+    """Create the diff worker's tracker once, when its process starts."""
+    global _diff_tracker
+    _diff_tracker = WebpageTracker()
+
+def generate_diff_in_worker(site_name, old_file, new_file, date_str):
+    """Generate a diff with the worker process's tracker.
+    
+    Defined at module level so it can be dispatched to worker processes.
+    """
+    return _diff_tracker.generate_diff(site_name, old_file, new_file, date_str)
+
 class WebpageTracker:
     def __init__(self, excel_file='webpages.xlsx'):
         self.excel_file = excel_file
@@ -37,8 +404,31 @@ class WebpageTracker:
         self.diffs_dir = Path('diffs')
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            # Compressed transfers for pages and text assets; brotli is a dependency so br decodes
+            'Accept-Encoding': 'gzip, deflate, br'
         })
+        # Keep a pooled connection per concurrent request instead of the default 10,
+        # and retry dropped connections and transient server errors instead of failing the
+        # whole page; after the last retry the error response itself is returned as before
+        adapter = HTTPAdapter(pool_connections=HOST_POOLS, pool_maxsize=URL_WORKERS + ASSET_WORKERS,
+                              max_retries=Retry(total=3, backoff_factor=0.3,
+                                                status_forcelist=RETRY_STATUSES, raise_on_status=False))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Saved versions per site, filled on first lookup (see list_versions)
+        self._versions = {}
+        # Shared by all pages so assets from every page in flight download in parallel
+        self.asset_executor = ThreadPoolExecutor(max_workers=ASSET_WORKERS)
+        # Recent asset downloads by URL, shared across pages (see _shared_download)
+        self._asset_memo = collections.OrderedDict()
+        self._asset_memo_lock = threading.Lock()
+        # Worker processes for generate_diff while run() is in progress
+        self.diff_pool = None
+        # One lock per site, so sheet rows that map to the same site_name are
+        # processed one after another instead of racing on its files (see site_lock)
+        self._site_locks = {}
+        self._site_locks_lock = threading.Lock()
         
         # Create directories if they don't exist
         self.webpage_versions_dir.mkdir(exist_ok=True)
@@ -46,46 +436,58 @@ class WebpageTracker:
     
     def read_urls_from_excel(self):
         """Read URLs from Excel file with new structure."""
+        # openpyxl is only needed here; importing it lazily keeps startup fast
+        # for tools that just reuse the extraction helpers
+        from openpyxl import load_workbook
         try:
             if not os.path.exists(self.excel_file):
                 logger.error(f"Excel file '{self.excel_file}' not found!")
                 return []
             
-            df = pd.read_excel(self.excel_file)
+            # Read-only mode streams the rows instead of loading the whole workbook
+            workbook = load_workbook(self.excel_file, read_only=True, data_only=True)
+            try:
+                rows = list(workbook.active.iter_rows(values_only=True))
+            finally:
+                workbook.close()
+            header = rows[0] if rows else ()
             
             # Check for required columns
             required_columns = ['NO.', 'AU - EN reference', 'AU - ZH Preview URL']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in required_columns if col not in header]
             if missing_columns:
                 logger.error(f"Excel file missing required columns: {missing_columns}")
                 return []
+            number_col, en_col, zh_col = (header.index(col) for col in required_columns)
+            
+            # Blank rows at the end of the sheet are not entries
+            entries = [row for row in rows[1:] if any(value is not None for value in row)]
             
-            # Create a list of URL entries with metadata
+            # Create a list of URL entries with metadata, skipping malformed and repeated URLs
             url_entries = []
-            for _, row in df.iterrows():
-                number = row['NO.']
-                au_en_url = row['AU - EN reference']
-                au_zh_url = row['AU - ZH Preview URL']
-                
-                # Add AU English URL
-                if pd.notna(au_en_url) and au_en_url.strip():
+            seen = set()
+            dropped = 0
+            for row in entries:
+                number = row[number_col]
+                for col, language, url_type in ((en_col, 'en', 'reference'), (zh_col, 'zh', 'preview')):
+                    url = row[col]
+                    if url is None or not str(url).strip():
+                        continue
+                    url = str(url).strip()
+                    if not VALID_URL.match(url) or (url, number, language) in seen:
+                        dropped += 1
+                        continue
+                    seen.add((url, number, language))
                     url_entries.append({
-                        'url': au_en_url.strip(),
+                        'url': url,
                         'number': number,
-                        'language': 'en',
-                        'type': 'reference'
-                    })
-                
-                # Add AU Chinese URL
-                if pd.notna(au_zh_url) and au_zh_url.strip():
-                    url_entries.append({
-                        'url': au_zh_url.strip(),
-                        'number': number,
-                        'language': 'zh',
-                        'type': 'preview'
+                        'language': language,
+                        'type': url_type
                     })
             
-            logger.info(f"Found {len(url_entries)} URLs in Excel file across {len(df)} entries")
+            if dropped:
+                logger.warning(f"Skipped {dropped} malformed or duplicate URLs in Excel file")
+            logger.info(f"Found {len(url_entries)} URLs in Excel file across {len(entries)} entries")
             return url_entries
             
         except Exception as e:
@@ -101,7 +503,6 @@ class WebpageTracker:
             url = url_info['url']
             
             # Extract domain and path from URL
-            from urllib.parse import urlparse
             parsed = urlparse(url)
             domain = parsed.netloc.replace('.', '-')
             path = parsed.path.strip('/').replace('/', '-')
@@ -118,30 +519,72 @@ class WebpageTracker:
             logger.error(f"Error generating site name for {url_info}: {e}")
             return "unknown_site"
     
-    def fetch_webpage(self, url):
-        """Fetch webpage content with comprehensive asset handling."""
+    def fetch_webpage(self, url, validators=None, asset_cache=None):
+        """Fetch webpage content with comprehensive asset handling.
+        
+        If a validators dict is given, its ETag/Last-Modified values are sent as
+        a conditional request and replaced with the ones from the response.
+        Returns NOT_MODIFIED when the server reports the page unchanged, or
+        sends the same body as on the fetch that filled validators.
+        If an asset_cache dict is given, assets in it younger than
+        ASSET_CACHE_MAX_AGE are embedded without downloading, and it is
+        replaced with the assets used by this page.
+        """
         try:
             logger.info(f"Fetching webpage: {url}")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            headers = {}
+            if validators:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            with self.session.get(url, timeout=30, headers=headers, stream=True) as response:
+                if response.status_code == 304:
+                    logger.info(f"Not modified since last fetch: {url}")
+                    return NOT_MODIFIED
+                response.raise_for_status()
+                content = self._read_body(response, MAX_PAGE_BYTES)
+            # Many servers send no validators, so also recognise an unchanged body before
+            # parsing it and embedding its assets
+            body_hash = blake2b(content, digest_size=16).hexdigest()
+            if validators is not None:
+                if validators.get('body_hash') == body_hash:
+                    logger.info(f"Same content as last fetch: {url}")
+                    return NOT_MODIFIED
+                validators.clear()
+                validators['etag'] = response.headers.get('ETag')
+                validators['last_modified'] = response.headers.get('Last-Modified')
+                validators['body_hash'] = body_hash
             
             # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(content, 'lxml')
+            
+            # Start every asset download before embedding any, so CSS, JS and images overlap
+            started = {}
+            cached = self._fresh_assets(asset_cache)
+            stylesheets, scripts, images = self._find_assets(soup)
+            css_assets = self._start_asset_downloads(stylesheets, 'href', url, started, cached)
+            js_assets = self._start_asset_downloads(scripts, 'src', url, started, cached)
+            image_assets = self._start_asset_downloads(images, 'src', url, started, cached, kind='image')
             
             # Download and embed CSS files
-            self._download_and_embed_css(soup, url)
+            self._download_and_embed_css(soup, css_assets)
             
             # Download and embed JavaScript files
-            self._download_and_embed_js(soup, url)
+            self._download_and_embed_js(soup, js_assets)
             
             # Download and embed images (convert to base64)
-            self._download_and_embed_images(soup, url)
+            self._download_and_embed_images(soup, image_assets)
+            
+            if asset_cache is not None:
+                self._update_asset_cache(asset_cache, started, cached)
             
-            # Prettify the enhanced HTML
-            prettified_html = soup.prettify()
+            # Serialize as-is; prettify() is slow on large pages and only adds whitespace,
+            # and diffs are made from the extracted text rather than the raw markup
+            html = str(soup)
             
-            logger.info(f"Successfully fetched {len(prettified_html)} characters from {url}")
-            return prettified_html
+            logger.info(f"Successfully fetched {len(html)} characters from {url}")
+            return html
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for {url}: {e}")
@@ -150,70 +593,219 @@ class WebpageTracker:
             logger.error(f"Error processing {url}: {e}")
             return None
     
-    def _download_and_embed_css(self, soup, base_url):
-        """Download and embed CSS files inline."""
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                try:
-                    css_url = self._resolve_url(href, base_url)
-                    response = self.session.get(css_url, timeout=10)
-                    if response.status_code == 200:
-                        css_content = response.text
-                        # Create style tag and replace link
-                        style_tag = soup.new_tag('style')
-                        style_tag.string = css_content
-                        link.replace_with(style_tag)
-                except Exception as e:
-                    logger.warning(f"Failed to embed CSS {href}: {e}")
-    
-    def _download_and_embed_js(self, soup, base_url):
-        """Download and embed JavaScript files inline."""
-        for script in soup.find_all('script', src=True):
-            src = script.get('src')
-            if src:
-                try:
-                    js_url = self._resolve_url(src, base_url)
-                    response = self.session.get(js_url, timeout=10)
-                    if response.status_code == 200:
-                        js_content = response.text
-                        # Update script tag content
-                        script.string = js_content
-                        script['src'] = None
-                except Exception as e:
-                    logger.warning(f"Failed to embed JS {src}: {e}")
-    
-    def _download_and_embed_images(self, soup, base_url):
-        """Download and embed images as base64."""
-        import base64
-        for img in soup.find_all('img'):
-            src = img.get('src')
-            if src and not src.startswith('data:'):
-                try:
-                    img_url = self._resolve_url(src, base_url)
-                    response = self.session.get(img_url, timeout=10)
-                    if response.status_code == 200:
-                        # Convert to base64
-                        img_base64 = base64.b64encode(response.content).decode('utf-8')
-                        content_type = response.headers.get('content-type', 'image/png')
-                        img['src'] = f"data:{content_type};base64,{img_base64}"
-                except Exception as e:
-                    logger.warning(f"Failed to embed image {src}: {e}")
+    def _find_assets(self, soup):
+        """Collect stylesheet links, external scripts and non-inline images in one pass over the DOM."""
+        stylesheets, scripts, images = [], [], []
+        for element in soup.find_all(['link', 'script', 'img']):
+            if element.name == 'link':
+                if 'stylesheet' in element.get('rel', []):
+                    stylesheets.append(element)
+            elif element.name == 'script':
+                if element.has_attr('src'):
+                    scripts.append(element)
+            elif not element.get('src', '').startswith('data:'):
+                images.append(element)
+        return stylesheets, scripts, images
+    
+    def _start_asset_downloads(self, elements, attr, base_url, started, cached, kind='text'):
+        """Start downloading the assets referenced by elements on the shared asset pool.
+        
+        Returns (element, ref, future) for each element with the attribute set;
+        refs already in started (same page) reuse the download in flight, and
+        refs in cached get an already completed future.
+        """
+        fetch = self._fetch_image if kind == 'image' else self._fetch_asset
+        assets = []
+        for element in elements:
+            ref = element.get(attr)
+            if ref:
+                key = f"{kind} {ref}"
+                if key not in started:
+                    if key in cached:
+                        started[key] = Future()
+                        started[key].set_result(cached[key][1])
+                    else:
+                        started[key] = self._shared_download(kind, fetch, ref, base_url)
+                assets.append((element, ref, started[key]))
+        return assets
+    
+    def _shared_download(self, kind, fetch, ref, base_url):
+        """Return a future for an asset, shared with every other page of the run using the same URL.
+        
+        Logos and stylesheets repeat across tracked pages, so the most recent
+        ASSET_MEMO_SIZE downloads are kept by resolved URL. Failed downloads are
+        retried by the next page that asks for them. Assets on IGNORED_ASSET_HOSTS
+        are not downloaded; their future resolves to None, leaving the element as is.
+        """
+        future = Future()
+        try:
+            url = self._resolve_url(ref, base_url)
+        except ValueError as e:
+            future.set_exception(e)
+            return future
+        if self._is_ignored_asset(url):
+            future.set_result(None)
+            return future
+        
+        key = (kind, url)
+        with self._asset_memo_lock:
+            future = self._asset_memo.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self.asset_executor.submit(fetch, url)
+                self._asset_memo[key] = future
+                if len(self._asset_memo) > ASSET_MEMO_SIZE:
+                    self._asset_memo.popitem(last=False)
+            else:
+                self._asset_memo.move_to_end(key)
+        return future
+    
+    def _is_ignored_asset(self, url):
+        """Check whether an asset URL is on one of IGNORED_ASSET_HOSTS or their subdomains."""
+        labels = (urlparse(url).hostname or '').split('.')
+        return any('.'.join(labels[i:]) in IGNORED_ASSET_HOSTS for i in range(len(labels) - 1))
+    
+    def _fresh_assets(self, asset_cache):
+        """Return the asset cache entries that are still young enough to reuse."""
+        if not asset_cache:
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in asset_cache.items() if now - entry[0] < ASSET_CACHE_MAX_AGE}
+    
+    def _update_asset_cache(self, asset_cache, started, cached):
+        """Replace the cache contents with the assets this page used, keeping their fetch times."""
+        now = time.time()
+        used = {}
+        for key, future in started.items():
+            if key in cached:
+                used[key] = cached[key]
+            elif future.exception() is None and future.result() is not None:
+                used[key] = [now, future.result()]
+        asset_cache.clear()
+        asset_cache.update(used)
+    
+    def _fetch_asset(self, url):
+        """Download a CSS/JS file referenced from a page; returns its text, or None unless 200.
+        
+        Without a charset in the response the file is taken to be UTF-8.
+        """
+        with self.session.get(url, stream=True, timeout=10) as response:
+            if response.status_code != 200:
+                return None
+            body = self._read_body(response, MAX_IMAGE_BYTES)
+            try:
+                return body.decode(response.encoding or 'utf-8', errors='replace')
+            except LookupError:
+                # Unknown charset names fall back to UTF-8, as requests' .text does
+                return body.decode('utf-8', errors='replace')
+    
+    def _read_body(self, response, limit):
+        """Read a streamed response body, giving up once it exceeds limit bytes."""
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and int(length) > limit:
+            raise ValueError(f"response is {int(length):,} bytes, over the {limit:,} byte limit")
+        
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(ASSET_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise ValueError(f"response is over the {limit:,} byte limit")
+            chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def _fetch_image(self, url):
+        """Stream an image into a base64 data: URL, giving up once it exceeds MAX_IMAGE_BYTES.
+        
+        Chunks are encoded as they arrive, so the raw image is never held whole
+        next to its encoding. Returns None if the server did not answer 200.
+        """
+        with self.session.get(url, stream=True, timeout=10) as response:
+            if response.status_code != 200:
+                return None
+            length = response.headers.get('content-length')
+            if length and length.isdigit() and int(length) > MAX_IMAGE_BYTES:
+                raise ValueError(f"image is {int(length):,} bytes, over the {MAX_IMAGE_BYTES:,} byte limit")
+            
+            encoded = []
+            size = 0
+            rest = b''
+            for chunk in response.iter_content(ASSET_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise ValueError(f"image is over the {MAX_IMAGE_BYTES:,} byte limit")
+                # Decoded (gzip) bodies can come in odd sizes; carry the bytes past a multiple of 3
+                if rest:
+                    chunk = rest + chunk
+                cut = len(chunk) - len(chunk) % 3
+                encoded.append(base64.b64encode(memoryview(chunk)[:cut]))
+                rest = chunk[cut:]
+            encoded.append(base64.b64encode(rest))
+            content_type = response.headers.get('content-type', 'image/png')
+            return f"data:{content_type};base64,{b''.join(encoded).decode('ascii')}"
+    
+    def _download_and_embed_css(self, soup, assets):
+        """Embed downloaded CSS files inline."""
+        for link, href, future in assets:
+            try:
+                css_content = future.result()
+                if css_content is not None:
+                    # Create style tag and replace link
+                    style_tag = soup.new_tag('style')
+                    style_tag.string = css_content
+                    link.replace_with(style_tag)
+            except Exception as e:
+                logger.warning(f"Failed to embed CSS {href}: {e}")
+    
+    def _download_and_embed_js(self, soup, assets):
+        """Embed downloaded JavaScript files inline."""
+        for script, src, future in assets:
+            try:
+                js_content = future.result()
+                if js_content is not None:
+                    # Update script tag content
+                    script.string = js_content
+                    script['src'] = None
+            except Exception as e:
+                logger.warning(f"Failed to embed JS {src}: {e}")
+    
+    def _download_and_embed_images(self, soup, assets):
+        """Embed downloaded images as base64 data: URLs."""
+        for img, src, future in assets:
+            try:
+                data_url = future.result()
+                if data_url:
+                    img['src'] = data_url
+            except Exception as e:
+                logger.warning(f"Failed to embed image {src}: {e}")
     
     def _resolve_url(self, relative_url, base_url):
         """Resolve relative URLs to absolute URLs."""
-        from urllib.parse import urljoin
+        # Absolute and protocol-relative references (most CDN assets) resolve without parsing,
+        # to exactly what urljoin would return
+        if relative_url.startswith(('http://', 'https://')):
+            return relative_url
+        if relative_url.startswith('//'):
+            return base_url[:base_url.index(':') + 1] + relative_url
         return urljoin(base_url, relative_url)
     
-    def save_webpage_version(self, site_name, html_content, date_str):
-        """Save webpage version to file."""
+    def save_webpage_version(self, site_name, html_content, date_str, content_hash=None):
+        """Save webpage version to file, with its content hash in a .hash sidecar."""
         try:
             site_dir = self.webpage_versions_dir / site_name
             site_dir.mkdir(parents=True, exist_ok=True)
             
+            # Encode once and write the bytes directly rather than through a text-mode wrapper
             filepath = site_dir / f"{date_str}.html"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            html_bytes = html_content.encode('utf-8')
+            filepath.write_bytes(html_bytes)
+            
+            if content_hash is None:
+                content_hash = self.hash_content(html_bytes)
+            filepath.with_suffix('.hash').write_text(content_hash, encoding='utf-8')
+            
+            versions = self.list_versions(site_name)
+            if filepath not in versions:
+                bisect.insort(versions, filepath)
             
             logger.info(f"Saved webpage version: {filepath}")
             return filepath
@@ -222,71 +814,157 @@ class WebpageTracker:
             logger.error(f"Error saving webpage version: {e}")
             return None
     
+    def load_site_cache(self, site_name, filename):
+        """Load a per-site JSON sidecar (fetch validators, embedded assets)."""
+        try:
+            with open(self.webpage_versions_dir / site_name / filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_site_cache(self, site_name, filename, data, loaded=None):
+        """Save a per-site JSON sidecar for the next fetch.
+        
+        Nothing is written if data equals loaded, the contents read before the
+        fetch; an unchanged asset cache can be megabytes of embedded assets.
+        """
+        if loaded is not None and data == loaded:
+            return
+        try:
+            with open(self.webpage_versions_dir / site_name / filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except OSError as e:
+            logger.warning(f"Could not save {filename} for {site_name}: {e}")
+    
+    def hash_content(self, html_content):
+        """Hash page content (str or UTF-8 bytes) to detect unchanged versions."""
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        return blake2b(html_content, digest_size=16).hexdigest()
+    
+    def get_version_hash(self, filepath):
+        """Get the content hash of a saved version, hashing the file if it has no sidecar."""
+        try:
+            return filepath.with_suffix('.hash').read_text(encoding='utf-8').strip()
+        except OSError:
+            with open(filepath, 'rb') as f:
+                return blake2b(f.read(), digest_size=16).hexdigest()
+    
+    def list_versions(self, site_name):
+        """List a webpage's saved versions, oldest first.
+        
+        Each site directory is scanned once per tracker and the list is kept up
+        to date by save_webpage_version, so later lookups need no directory I/O.
+        """
+        versions = self._versions.get(site_name)
+        if versions is None:
+            site_dir = self.webpage_versions_dir / site_name
+            try:
+                with os.scandir(site_dir) as it:
+                    versions = sorted(site_dir / entry.name for entry in it
+                                      if entry.name.endswith('.html') and entry.is_file())
+            except FileNotFoundError:
+                versions = []
+            self._versions[site_name] = versions
+        return versions
+    
+    def get_latest_version(self, site_name):
+        """Get the most recent saved version of a webpage."""
+        versions = self.list_versions(site_name)
+        return versions[-1] if versions else None
+    
     def get_previous_version(self, site_name):
         """Get the most recent previous version of a webpage."""
         try:
-            site_dir = self.webpage_versions_dir / site_name
-            if not site_dir.exists():
-                return None
-            
-            # Get all HTML files and sort by date
-            html_files = list(site_dir.glob("*.html"))
-            if len(html_files) < 2:  # Need at least 2 files for diff
+            # Need at least 2 files for diff
+            html_files = self.list_versions(site_name)
+            if len(html_files) < 2:
                 return None
             
-            # Sort by filename (date) and get the second most recent
-            html_files.sort(reverse=True)
-            return str(html_files[1])  # Return the previous version
+            # Sorted by filename (date), so the previous version is second to last
+            return str(html_files[-2])
             
         except Exception as e:
             logger.error(f"Error getting previous version: {e}")
             return None
     
     def extract_text_content(self, html_content):
-        """Extract clean, readable text content from HTML."""
+        """Extract clean, readable text content from HTML (a str, or UTF-8 bytes).
+        
+        Uses lxml directly rather than BeautifulSoup: only text is needed, and
+        building and walking a soup tree costs many times more than lxml's parse.
+        Returns None if the page could not be parsed, so a failure is never
+        mistaken for a page without text.
+        """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "noscript"]):
-                script.decompose()
+            if isinstance(html_content, str):
+                html_content = html_content.encode('utf-8')
+            
+            # libxml2 drops anything after </html>, where browsers (and BeautifulSoup) keep
+            # it; without the closing tags it is parsed as the rest of the body
+            document = lxml.html.document_fromstring(CLOSING_DOCUMENT_TAGS.sub(b'', html_content),
+                                                     parser=UTF8_HTML_PARSER)
+            
+            # Remove script and style elements, keeping the text that follows them; template
+            # and ruby annotation text is left out too, as BeautifulSoup's get_text() does
+            etree.strip_elements(document, 'script', 'style', 'noscript', 'template', 'rt', 'rp', with_tail=False)
+            
+            # Sort the meaningful elements into buckets in a single walk over the tree
+            title = None
+            headings = collections.defaultdict(list)
+            paragraphs = []
+            list_items = {}  # ul/ol -> texts of every <li> inside it, lists in document order
+            links = []
+            for element in document.iter(*TEXT_TAGS):
+                name = element.tag
+                if name == 'title':
+                    if title is None:
+                        title = element
+                elif name in HEADING_TAGS:
+                    headings[name].append(element)
+                elif name == 'p':
+                    paragraphs.append(element)
+                elif name in ('ul', 'ol'):
+                    list_items[element] = []
+                elif name == 'li':
+                    # A nested item is listed under each enclosing list, as find_all('li') per list did
+                    text = None
+                    for parent in element.iterancestors('ul', 'ol'):
+                        if text is None:
+                            text = element.text_content().strip()
+                        list_items[parent].append(text)
+                elif name == 'a':
+                    links.append(element)
             
             # Extract text from meaningful elements
             text_sections = []
             
             # Get title
-            title = soup.find('title')
-            if title and title.get_text().strip():
-                text_sections.append(f"TITLE: {title.get_text().strip()}")
+            if title is not None and title.text_content().strip():
+                text_sections.append(f"TITLE: {title.text_content().strip()}")
             
             # Get headings (h1-h6)
-            for i in range(1, 7):
-                headings = soup.find_all(f'h{i}')
-                for heading in headings:
-                    text = heading.get_text().strip()
+            for i, tag in enumerate(HEADING_TAGS, 1):
+                for heading in headings[tag]:
+                    text = heading.text_content().strip()
                     if text:
                         text_sections.append(f"H{i}: {text}")
             
             # Get paragraphs
-            paragraphs = soup.find_all('p')
             for p in paragraphs:
-                text = p.get_text().strip()
+                text = p.text_content().strip()
                 if text and len(text) > 10:  # Only meaningful paragraphs
                     text_sections.append(f"PARAGRAPH: {text}")
             
             # Get list items
-            lists = soup.find_all(['ul', 'ol'])
-            for lst in lists:
-                items = lst.find_all('li')
-                for item in items:
-                    text = item.get_text().strip()
+            for items in list_items.values():
+                for text in items:
                     if text:
                         text_sections.append(f"LIST ITEM: {text}")
             
             # Get navigation links (if they have meaningful text)
-            nav_links = soup.find_all('a')
-            for link in nav_links:
-                text = link.get_text().strip()
+            for link in links:
+                text = link.text_content().strip()
                 href = link.get('href', '')
                 if text and len(text) > 2 and not text.startswith('http'):
                     text_sections.append(f"LINK: {text} ({href})")
@@ -295,15 +973,49 @@ class WebpageTracker:
             
         except Exception as e:
             logger.error(f"Error extracting text content: {e}")
-            return []
+            return None
 
-    def analyze_changes(self, old_text_sections, new_text_sections):
-        """Analyze and count different types of changes between text sections."""
+    def load_text_sections(self, html_file):
+        """Get the text sections of a saved version, cached in a .sections.json sidecar.
+        
+        Each version is diffed twice (against the day before and the day after),
+        so the sidecar saves reading and parsing the multi-MB page the second time.
+        Returns None if the page could not be parsed.
+        """
+        html_file = Path(html_file)
+        sidecar = html_file.with_suffix('.sections.json')
+        try:
+            if sidecar.stat().st_mtime_ns >= html_file.stat().st_mtime_ns:
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+        
+        with open(html_file, 'rb') as f:
+            text_sections = self.extract_text_content(f.read())
+        self.save_text_sections(html_file, text_sections)
+        return text_sections
+    
+    def save_text_sections(self, html_file, text_sections):
+        """Write the .sections.json sidecar of a saved version for load_text_sections."""
+        # A failed extraction is retried next time rather than cached
+        if text_sections is not None:
+            try:
+                with open(Path(html_file).with_suffix('.sections.json'), 'w', encoding='utf-8') as f:
+                    json.dump(text_sections, f, ensure_ascii=False)
+            except OSError as e:
+                logger.warning(f"Could not cache text sections for {html_file}: {e}")
+    
+    def analyze_changes(self, old_text_sections, new_text_sections, opcodes=None):
+        """Analyze and count different types of changes between text sections.
+        
+        opcodes are those of section_opcodes() for the two lists, if the caller
+        already matched them for the diff table.
+        """
         try:
-            from difflib import SequenceMatcher
-            
             # Create a detailed diff
-            matcher = SequenceMatcher(None, old_text_sections, new_text_sections)
+            if opcodes is None:
+                opcodes = section_opcodes(old_text_sections, new_text_sections)
             
             # Count different types of changes
             changes = {
@@ -315,7 +1027,7 @@ class WebpageTracker:
             }
             
             # Analyze each operation
-            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            for tag, i1, i2, j1, j2 in opcodes:
                 if tag == 'replace':
                     changes['modified'] += max(i2 - i1, j2 - j1)
                     changes['total_changes'] += max(i2 - i1, j2 - j1)
@@ -359,16 +1071,11 @@ class WebpageTracker:
     def get_change_summary(self, old_file, new_file):
         """Get a summary of changes between two files without generating a full diff."""
         try:
-            # Read files
-            with open(old_file, 'r', encoding='utf-8') as f:
-                old_html = f.read()
-            
-            with open(new_file, 'r', encoding='utf-8') as f:
-                new_html = f.read()
-            
             # Extract text content
-            old_text_sections = self.extract_text_content(old_html)
-            new_text_sections = self.extract_text_content(new_html)
+            old_text_sections = self.load_text_sections(old_file)
+            new_text_sections = self.load_text_sections(new_file)
+            if old_text_sections is None or new_text_sections is None:
+                return None
             
             # Analyze changes
             changes = self.analyze_changes(old_text_sections, new_text_sections)
@@ -388,42 +1095,56 @@ class WebpageTracker:
             return None
 
     def generate_diff(self, site_name, old_file, new_file, date_str):
-        """Generate readable text diff between two webpage versions."""
+        """Generate readable text diff between two webpage versions.
+        
+        Returns the diff file, or None if it failed or the two versions have the same text.
+        """
         try:
+            # Identical versions have nothing to diff; the hash sidecars answer without parsing either page
+            if self.get_version_hash(Path(old_file)) == self.get_version_hash(Path(new_file)):
+                logger.info(f"No changes between {Path(old_file).stem} and {date_str}, skipping diff")
+                return None
+            
             # Create diff directory for this site
             site_diff_dir = self.diffs_dir / site_name
             site_diff_dir.mkdir(parents=True, exist_ok=True)
             
-            # Read old and new files
-            with open(old_file, 'r', encoding='utf-8') as f:
-                old_html = f.read()
+            # Extract text content of the old and new versions
+            old_text_sections = self.load_text_sections(old_file)
+            new_text_sections = self.load_text_sections(new_file)
+            if old_text_sections is None or new_text_sections is None:
+                # Not the same as no changes: say so instead of skipping the diff quietly
+                logger.error(f"Could not extract text to diff {Path(old_file).stem} and {date_str} of {site_name}")
+                return None
             
-            with open(new_file, 'r', encoding='utf-8') as f:
-                new_html = f.read()
+            # Pages often change only in markup (tokens, asset URLs, embeds) and not in their text
+            if old_text_sections == new_text_sections:
+                logger.info(f"No text changes between {Path(old_file).stem} and {date_str}, skipping diff")
+                return None
             
-            # Extract text content
-            old_text_sections = self.extract_text_content(old_html)
-            new_text_sections = self.extract_text_content(new_html)
+            # Match the sections once for both the change statistics and the diff table
+            opcodes = section_opcodes(old_text_sections, new_text_sections)
             
             # Analyze changes
-            changes = self.analyze_changes(old_text_sections, new_text_sections)
+            changes = self.analyze_changes(old_text_sections, new_text_sections, opcodes)
             
             # Generate text diff
-            diff = HtmlDiff()
-            diff_html = diff.make_file(old_text_sections, new_text_sections,
+            diff = SectionHtmlDiff()
+            diff_render = diff.iter_viewer if DIFF_FORMAT == 'json' else diff.iter_file
+            diff_parts = diff_render(old_text_sections, new_text_sections,
                                      fromdesc=f"Version {Path(old_file).stem} (Text Content)",
-                                     todesc=f"Version {date_str} (Text Content)")
+                                     todesc=f"Version {date_str} (Text Content)", opcodes=opcodes)
             
-            # Create enhanced diff with better styling and change statistics
-            enhanced_diff_html = self.create_enhanced_diff_html(
-                diff_html, site_name, old_file, new_file, date_str,
+            # Create enhanced diff with better styling and change statistics; the page is
+            # rendered around a placeholder so the diff itself never has to be one big string
+            page_head, page_tail = self.create_enhanced_diff_html(
+                DIFF_PLACEHOLDER, site_name, old_file, new_file, date_str,
                 len(old_text_sections), len(new_text_sections), changes
-            )
+            ).split(DIFF_PLACEHOLDER)
             
             # Save diff file
             diff_file = site_diff_dir / f"diff_{Path(old_file).stem}_to_{date_str}.html"
-            with open(diff_file, 'w', encoding='utf-8') as f:
-                f.write(enhanced_diff_html)
+            self.write_diff_file(diff_file, itertools.chain([page_head], diff_parts, [page_tail]))
             
             logger.info(f"Generated text diff: {diff_file}")
             return diff_file
@@ -432,6 +1153,37 @@ class WebpageTracker:
             logger.error(f"Error generating diff: {e}")
             return None
 
+    def write_diff_file(self, diff_file, parts):
+        """Write a diff page from string pieces, along with its .gz and .br copies.
+        
+        The compressed copies let the web server send diffs without compressing
+        per request. Pieces are encoded in DIFF_WRITE_CHUNK batches and fed to all
+        three files, so only one batch is held in memory at a time.
+        """
+        # The page is opened last so it is closed first: the web server only serves
+        # compressed copies whose mtime is not older than the page's
+        with gzip.open(f"{diff_file}.gz", 'wb', compresslevel=6) as gz, open(f"{diff_file}.br", 'wb') as br, \
+                open(diff_file, 'wb') as raw:
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            
+            def write(chunk):
+                data = ''.join(chunk).encode('utf-8')
+                raw.write(data)
+                gz.write(data)
+                br.write(compressor.process(data))
+            
+            chunk = []
+            size = 0
+            for part in parts:
+                chunk.append(part)
+                size += len(part)
+                if size >= DIFF_WRITE_CHUNK:
+                    write(chunk)
+                    chunk = []
+                    size = 0
+            write(chunk)
+            br.write(compressor.finish())
+    
     def create_enhanced_diff_html(self, diff_html, site_name, old_file, new_file, date_str, old_count, new_count, changes):
         """Create enhanced diff HTML with better styling, navigation, search functionality, and change statistics."""
         enhanced_html = f"""
@@ -552,10 +1304,17 @@ class WebpageTracker:
             margin-bottom: 10px;
             font-weight: bold;
         }}
+        .diff td.diff_header {{
+            text-align: right;
+        }}
         .diff .diff_next {{
             background-color: #e8f5e8;
             color: #2d5a2d;
         }}
+        .diff .diff_add {{
+            background-color: #d4edda;
+            color: #155724;
+        }}
         .diff .diff_sub {{
             background-color: #ffeaea;
             color: #8b0000;
@@ -566,22 +1325,33 @@ class WebpageTracker:
         }}
         
         /* Highlighted changes */
-        .diff-row {{
+        .diff tr {{
             transition: background-color 0.3s;
         }}
-        .diff-row.highlighted {{
-            background-color: #fff3cd !important;
-            border-left: 4px solid #ffc107;
-        }}
-        .diff-row.changed {{
+        .diff tr.changed {{
             background-color: #fff3cd !important;
         }}
-        .diff-row.added {{
+        .diff tr.added {{
             background-color: #e8f5e8 !important;
         }}
-        .diff-row.removed {{
+        .diff tr.removed {{
             background-color: #ffeaea !important;
         }}
+        /* After the row colours so it wins on change rows; rows take outlines but not borders */
+        .diff tr.highlighted {{
+            background-color: #fff3cd !important;
+            outline: 3px solid #ffc107;
+        }}
+        .changes-only .diff tr:not(.has-change) {{
+            display: none;
+        }}
+        .searching .diff tr:not(.search-match) {{
+            display: none;
+        }}
+        .searching .diff tr.search-match {{
+            display: table-row;
+            background-color: #fff3cd;
+        }}
         
         /* Jump to change buttons */
         .jump-to-change {{
@@ -733,6 +1503,9 @@ class WebpageTracker:
         let changeRows = [];
         let showChangesOnly = false;
         let originalRows = [];
+        let searchTexts = new WeakMap();
+        let searchFrame = null;
+        let highlightedRow = null;
         let changesData = {{
             'total_changes': {changes['total_changes']},
             'change_percentage': {changes['change_percentage']}
@@ -744,42 +1517,32 @@ class WebpageTracker:
         }});
         
         function setupDiffInterface() {{
-            // Find all diff rows
-            const rows = document.querySelectorAll('.diff tr');
-            originalRows = Array.from(rows);
+            // Find all diff rows once; the handlers below only use these lists
+            originalRows = Array.from(document.querySelectorAll('.diff tr'));
             
-            // Identify change rows
-            changeRows = rows.filter(row => {{
-                return row.querySelector('.diff_add, .diff_sub, .diff_chg') !== null;
-            }});
+            // Change rows come tagged has-change (and added/removed/changed) from the server
+            changeRows = originalRows.filter(row => row.classList.contains('has-change'));
             
             updateChangeCounter();
             
-            // Add click handlers to rows
-            rows.forEach(row => {{
-                row.addEventListener('click', function() {{
-                    highlightRow(this);
-                }});
-                
-                // Add change indicators
-                if (row.querySelector('.diff_add')) {{
-                    row.classList.add('added');
-                }} else if (row.querySelector('.diff_sub')) {{
-                    row.classList.add('removed');
-                }} else if (row.querySelector('.diff_chg')) {{
-                    row.classList.add('changed');
+            // One click handler for the whole table instead of one per row
+            document.getElementById('diffContainer').addEventListener('click', function(e) {{
+                const row = e.target.closest('.diff tr');
+                if (row) {{
+                    highlightRow(row);
                 }}
             }});
         }}
         
         function highlightRow(row) {{
-            // Remove previous highlights
-            document.querySelectorAll('.diff-row.highlighted').forEach(r => {{
-                r.classList.remove('highlighted');
-            }});
+            // Remove previous highlight
+            if (highlightedRow) {{
+                highlightedRow.classList.remove('highlighted');
+            }}
             
             // Add highlight to clicked row
             row.classList.add('highlighted');
+            highlightedRow = row;
             row.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
         }}
         
@@ -797,65 +1560,62 @@ class WebpageTracker:
             highlightRow(changeRows[currentChangeIndex]);
         }}
         
-        function toggleChangedOnly() {{
-            showChangesOnly = !showChangesOnly;
-            const container = document.getElementById('diffContainer');
-            const rows = container.querySelectorAll('.diff tr');
-            
-            rows.forEach(row => {{
-                const hasChanges = row.querySelector('.diff_add, .diff_sub, .diff_chg') !== null;
-                if (showChangesOnly) {{
-                    row.style.display = hasChanges ? 'table-row' : 'none';
-                }} else {{
-                    row.style.display = 'table-row';
-                }}
-            }});
+        function setChangesOnly(changesOnly) {{
+            // The .changes-only rule hides unchanged rows, so no row is touched here
+            showChangesOnly = changesOnly;
+            document.getElementById('diffContainer').classList.toggle('changes-only', changesOnly);
             
             // Update button text
-            const button = event.target;
+            const button = document.querySelector('button[onclick="toggleChangedOnly()"]');
             button.textContent = showChangesOnly ? '👁️ Show All' : '👁️ Show Changes Only';
         }}
         
+        function toggleChangedOnly() {{
+            setChangesOnly(!showChangesOnly);
+        }}
+        
         function expandAll() {{
-            showChangesOnly = false;
-            const rows = document.querySelectorAll('.diff tr');
-            rows.forEach(row => {{
-                row.style.display = 'table-row';
-            }});
-            document.querySelector('button[onclick="toggleChangedOnly()"]').textContent = '👁️ Show Changes Only';
+            setChangesOnly(false);
         }}
         
         function collapseAll() {{
-            showChangesOnly = true;
-            const rows = document.querySelectorAll('.diff tr');
-            rows.forEach(row => {{
-                const hasChanges = row.querySelector('.diff_add, .diff_sub, .diff_chg') !== null;
-                row.style.display = hasChanges ? 'table-row' : 'none';
-            }});
-            document.querySelector('button[onclick="toggleChangedOnly()"]').textContent = '👁️ Show All';
+            setChangesOnly(true);
         }}
         
         function searchContent(query) {{
-            if (!query) {{
-                // Reset all rows
-                originalRows.forEach(row => {{
-                    row.style.display = 'table-row';
-                    row.style.backgroundColor = '';
-                }});
-                return;
-            }}
-            
-            const rows = document.querySelectorAll('.diff tr');
-            rows.forEach(row => {{
-                const text = row.textContent.toLowerCase();
-                const matches = text.includes(query.toLowerCase());
+            // Match every row first, then mark them all in one frame and scroll once
+            // to the first match; the .searching rules hide and highlight the rows
+            if (searchFrame !== null) cancelAnimationFrame(searchFrame);
+            const needle = query.toLowerCase();
+            const matches = needle ? originalRows.map(row => {{
+                // A row's text never changes, so it is read and lowercased once
+                let text = searchTexts.get(row);
+                if (text === undefined) {{
+                    text = row.textContent.toLowerCase();
+                    searchTexts.set(row, text);
+                }}
+                return text.includes(needle);
+            }}) : null;
+            
+            searchFrame = requestAnimationFrame(() => {{
+                searchFrame = null;
+                const container = document.getElementById('diffContainer');
+                if (!matches) {{
+                    // Back to whatever the changes-only setting shows
+                    container.classList.remove('searching');
+                    return;
+                }}
                 
-                if (matches) {{
-                    row.style.display = 'table-row';
-                    row.style.backgroundColor = '#fff3cd';
-                    row.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                }} else {{
-                    row.style.display = 'none';
+                let firstMatch = null;
+                originalRows.forEach((row, i) => {{
+                    row.classList.toggle('search-match', matches[i]);
+                    if (matches[i] && !firstMatch) {{
+                        firstMatch = row;
+                    }}
+                }});
+                container.classList.add('searching');
+                if (firstMatch) {{
+                    firstMatch.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
                 }}
             }});
         }}
@@ -881,26 +1641,68 @@ class WebpageTracker:
         """
         return enhanced_html
     
-    def process_url(self, url_info):
-        """Process a single URL: fetch, save, and create diff."""
+    def site_lock(self, site_name):
+        """Return the lock held while a site's version, sidecars and diff are written."""
+        with self._site_locks_lock:
+            return self._site_locks.setdefault(site_name, threading.Lock())
+    
+    def process_url(self, url_info, date_str=None):
+        """Process a single URL: fetch, save, and create diff.
+        
+        date_str names the saved version; run() passes one date for the whole run.
+        """
         try:
+            logger.info(f"Processing URL: {url_info['url']}")
             site_name = self.get_site_name(url_info)
-            date_str = datetime.now().strftime('%Y-%m-%d')
-            
-            # Fetch webpage
-            html_content = self.fetch_webpage(url_info['url'])
-            if not html_content:
-                return False
-            
-            # Save webpage version
-            self.save_webpage_version(site_name, html_content, date_str)
-            
-            # Generate diff if previous version exists
-            previous_version = self.get_previous_version(site_name)
-            if previous_version:
-                self.generate_diff(site_name, previous_version, f"{self.webpage_versions_dir}/{site_name}/{date_str}.html", date_str)
-            
-            return True
+            if date_str is None:
+                date_str = date.today().isoformat()
+            
+            # Rows with the same site_name (duplicates, or URLs differing only in query or
+            # fragment) share one folder, so they take turns instead of running concurrently
+            with self.site_lock(site_name):
+                # Fetch webpage, conditionally if there is a saved version to fall back on
+                latest_version = self.get_latest_version(site_name)
+                validators = self.load_site_cache(site_name, VALIDATORS_FILE) if latest_version else {}
+                asset_cache = self.load_site_cache(site_name, ASSET_CACHE_FILE)
+                # Copies of what was loaded, so unchanged sidecars are not rewritten
+                loaded_validators, loaded_assets = dict(validators), dict(asset_cache)
+                html_content = self.fetch_webpage(url_info['url'], validators, asset_cache)
+                if html_content is NOT_MODIFIED:
+                    logger.info(f"No changes since {latest_version.stem}: {url_info['url']}")
+                    return True
+                if not html_content:
+                    return False
+                
+                # Unchanged pages need neither a new version nor a diff
+                content_hash = self.hash_content(html_content)
+                if latest_version and self.get_version_hash(latest_version) == content_hash:
+                    logger.info(f"No changes since {latest_version.stem}: {url_info['url']}")
+                    self.save_site_cache(site_name, VALIDATORS_FILE, validators, loaded_validators)
+                    self.save_site_cache(site_name, ASSET_CACHE_FILE, asset_cache, loaded_assets)
+                    return True
+                
+                # Save webpage version
+                filepath = self.save_webpage_version(site_name, html_content, date_str, content_hash)
+                if not filepath:
+                    return False
+                self.save_site_cache(site_name, VALIDATORS_FILE, validators, loaded_validators)
+                self.save_site_cache(site_name, ASSET_CACHE_FILE, asset_cache, loaded_assets)
+                
+                # The diff reads the new version's text from its sidecar; extract it from the
+                # page in memory instead of reading the saved file back
+                self.save_text_sections(filepath, self.extract_text_content(html_content))
+                
+                # Generate diff if previous version exists
+                previous_version = self.get_previous_version(site_name)
+                if previous_version:
+                    new_file = str(filepath)
+                    if self.diff_pool:
+                        # Blocks only this URL's thread; other pages keep fetching and diffing
+                        self.diff_pool.submit(generate_diff_in_worker, site_name, str(previous_version), new_file, date_str).result()
+                    else:
+                        self.generate_diff(site_name, previous_version, new_file, date_str)
+                
+                return True
             
         except Exception as e:
             logger.error(f"Error processing URL {url_info['url']}: {e}")
@@ -918,15 +1720,26 @@ class WebpageTracker:
         success_count = 0
         total_count = len(urls)
         
-        for url_info in urls:
-            logger.info(f"Processing URL: {url_info['url']}")
-            if self.process_url(url_info):
-                success_count += 1
-            else:
-                logger.error(f"Failed to process URL: {url_info['url']}")
-            
-            # Add delay between requests
-            time.sleep(2)
+        # Group pages by host so consecutive fetches reuse its keep-alive connections
+        urls.sort(key=lambda url_info: urlparse(url_info['url']).netloc)
+        
+        # Every page of a run is saved under the date it started, even past midnight
+        date_str = date.today().isoformat()
+        
+        # Pages are independent, so fetch several at once instead of one every 2 seconds.
+        # Worker processes are spawned rather than forked from this multithreaded process.
+        try:
+            with ThreadPoolExecutor(max_workers=URL_WORKERS) as executor, \
+                    ProcessPoolExecutor(max_workers=DIFF_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_diff_worker) as self.diff_pool:
+                for url_info, success in zip(urls, executor.map(self.process_url, urls, itertools.repeat(date_str))):
+                    if success:
+                        success_count += 1
+                    else:
+                        logger.error(f"Failed to process URL: {url_info['url']}")
+        finally:
+            # A pool that has been shut down must not be used by later process_url calls
+            self.diff_pool = None
         
         logger.info(f"Processing complete! {success_count}/{total_count} URLs processed successfully.")
 